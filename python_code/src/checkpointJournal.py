@@ -0,0 +1,90 @@
+# checkpointJournal.py
+# Date: 10/18/2026
+# Purpose: An append-only journal of the work main.py has finished (which repo, which phase, and which PR ids of that
+#          phase), so a run that died part of the way through can pick up exactly where it stopped.
+
+import threading
+import datetime
+import os
+from targetManager import TargetManager
+
+PULLS = "pulls"
+USERS = "users"
+COMMITS = "commits"
+PHASE_FINISHED = "*"
+
+
+# The journal item of a [pull state, pull id]. The state is part of it, so a PR that moved to another state since it was
+# recorded (e.g. from open to closed) is downloaded again into its new state folder
+def get_pull_item(pull_info):
+    return str(pull_info[0]) + "/" + str(pull_info[1])
+
+
+class CheckpointJournal:
+    def __init__(self, home_path, journal_name):
+        self.HOME_PATH = str(home_path)
+        self.JOURNAL_NAME = str(journal_name)
+        self.LOCK = threading.Lock()
+        self.FINISHED = None
+        self.TORN_LAST_LINE = False
+
+    def get_journal_path(self):
+        return os.path.join(self.HOME_PATH, self.JOURNAL_NAME + ".log")
+
+    # Every record is one "repo <tab> phase <tab> item" line. A line without its newline was cut off by a crash while it
+    # was being written, and is ignored
+    def _load(self):
+        if self.FINISHED is not None:
+            return
+        self.FINISHED = dict()
+        if not os.path.isfile(CheckpointJournal.get_journal_path(self)):
+            return
+        with open(CheckpointJournal.get_journal_path(self), 'r', encoding='utf-8') as journal_file:
+            for line in journal_file:
+                self.TORN_LAST_LINE = not line.endswith("\n")
+                if self.TORN_LAST_LINE or line.count("\t") != 2:
+                    continue
+                repo, phase, item = line.rstrip("\n").split("\t")
+                if item:
+                    self.FINISHED.setdefault((repo, phase), set()).add(item)
+
+    def _append(self, repo, phase, item):
+        with self.LOCK:
+            CheckpointJournal._load(self)
+            with open(CheckpointJournal.get_journal_path(self), 'a', encoding='utf-8') as journal_file:
+                if self.TORN_LAST_LINE:
+                    journal_file.write("\t\n")  # end the cut off record with one field too many, so it stays ignored
+                    self.TORN_LAST_LINE = False
+                journal_file.write(str(repo) + "\t" + str(phase) + "\t" + str(item) + "\n")
+                if item == PHASE_FINISHED:
+                    journal_file.flush()
+                    os.fsync(journal_file.fileno())
+            self.FINISHED.setdefault((repo, phase), set()).add(str(item))
+
+    def record_item_finished(self, repo, phase, item):
+        CheckpointJournal._append(self, repo, phase, item)
+
+    def record_phase_finished(self, repo, phase):
+        CheckpointJournal._append(self, repo, phase, PHASE_FINISHED)
+
+    def get_finished_items(self, repo, phase):
+        with self.LOCK:
+            CheckpointJournal._load(self)
+            return set(self.FINISHED.get((repo, phase), set())) - {PHASE_FINISHED}
+
+    def is_phase_finished(self, repo, phase):
+        with self.LOCK:
+            CheckpointJournal._load(self)
+            return PHASE_FINISHED in self.FINISHED.get((repo, phase), set())
+
+    # Once a run is complete its journal is set aside, so the next run starts from the beginning again
+    def archive(self):
+        with self.LOCK:
+            if os.path.isfile(CheckpointJournal.get_journal_path(self)):
+                archive_name = self.JOURNAL_NAME + "_" + datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + ".log"
+                os.rename(CheckpointJournal.get_journal_path(self), os.path.join(self.HOME_PATH, archive_name))
+            self.FINISHED = None
+
+
+targetManager = TargetManager(os.getcwd())
+CHECKPOINT_JOURNAL = CheckpointJournal(targetManager.get_important_text_files_path(), "CHECKPOINT_JOURNAL")
@@ -4,13 +4,23 @@
 # Purpose: Comb through separated Pull Request CSV files that exist in the Target Structure, and combine
 #          them into one amalgamated CSV file containing all relevant raw Pull Request Data
 
+from concurrent.futures import ThreadPoolExecutor
 from targetManager import TargetManager
+import tempfile
+import hashlib
+import shutil
+import json
 import csv
+import io
 import os
 
 targetManager = TargetManager(os.getcwd())
 collected_repos_path = os.path.join(targetManager.get_collected_repos_path(), "collected_repos.txt")
 
+# Repos whose stage_01 CSVs are read (and whose part of the combined file is written) at the same time
+COMBINE_THREADS = os.cpu_count() or 4
+COPY_BUFFER_SIZE = 1024 * 1024
+
 def initialize_combined_csvs_file():
     massive_csv_file_path = get_combined_csvs_file_path()
     with open(massive_csv_file_path, "w", newline="", encoding="utf-8") as big_csv_file:
@@ -19,53 +29,142 @@ def initialize_combined_csvs_file():
                       "# COMMITS,# ADDITIONS,# DELETIONS,# FILES CHANGED"
         writer.writerow([descriptors])
         big_csv_file.close()
-    return
+    return os.path.getsize(massive_csv_file_path)
 
 def get_combined_csvs_file_path():
     return os.path.join(targetManager.get_important_csv_files_path(), "combined_pull_request_data.csv")
 
-def combine_pull_csvs_into_one(repo):
+# Which bytes of the combined file every repo wrote, with the SHA-1 of those bytes, in the order they appear
+def get_combined_csvs_manifest_path():
+    return os.path.join(targetManager.get_important_csv_files_path(), "combined_pull_request_data_manifest.json")
+
+def get_stage_01_csv_paths_for(repo):
     csv_merged_path = targetManager.join_path(targetManager.get_merged_pull_request_level_subdirectory_for(repo),
                                      "stage_01_pull_requests_closed_merged.csv")
     csv_unmerged_path = targetManager.join_path(targetManager.get_unmerged_pull_request_level_subdirectory_for(repo),
                                     "stage_01_pull_requests_closed_unmerged.csv")
     csv_open_path = targetManager.join_path(targetManager.get_open_pull_request_level_subdirectory_for(repo),
                                     "stage_01_pull_requests_open.csv")
-    csv_path_list = [csv_merged_path, csv_unmerged_path, csv_open_path]
-    csv_content_list = list()
+    return [csv_merged_path, csv_unmerged_path, csv_open_path]
+
+# The repo's part of the combined file, as chunks of bytes: every row of its stage_01 CSVs (a state without PRs has no
+# CSV) after the header, joined with "," and written again with the combined file's escaping, one row at a time
+def _get_combined_csv_chunks_for(csv_path_list):
     for csv_path in csv_path_list:
+        if not os.path.isfile(csv_path):
+            continue
         with open(csv_path, "r", newline="", encoding="utf-8") as csv_file:
             reader = csv.reader(csv_file)
-            next(reader)
+            next(reader, None)
+            chunk = io.StringIO()
+            writer = csv.writer(chunk, quoting=csv.QUOTE_NONE, delimiter='|', quotechar='', escapechar='\\')
+            for pull_request_data_list in reader:
+                string = ""
+                for pull_request_data in pull_request_data_list:
+                    string += (str(pull_request_data) + ",")
+                writer.writerow([string])
+                if chunk.tell() >= COPY_BUFFER_SIZE:
+                    yield chunk.getvalue().encode("utf-8")
+                    chunk.seek(0)
+                    chunk.truncate()
+            yield chunk.getvalue().encode("utf-8")
 
-            for line_list in reader:
-                csv_content_list.append(line_list)
-            csv_file.close()
-
-    massive_csv_file_path = get_combined_csvs_file_path()
-    with open(massive_csv_file_path, "a", newline="", encoding="utf-8") as big_csv_file:
-        writer = csv.writer(big_csv_file, quoting=csv.QUOTE_NONE, delimiter='|', quotechar='', escapechar='\\')
-        for pull_request_data_list in csv_content_list:
-            string = ""
-            for pull_request_data in pull_request_data_list:
-                string += (str(pull_request_data) + ",")
-            writer.writerow([string])
+# Return the (length, SHA-1) of the repo's part of the combined file, writing it to output_path unless that is None
+def _copy_combined_csv_rows(csv_path_list, output_path=None):
+    checksum = hashlib.sha1()
+    length = 0
+    output_file = open(output_path, "wb") if output_path is not None else None
+    try:
+        for chunk in _get_combined_csv_chunks_for(csv_path_list):
+            checksum.update(chunk)
+            length += len(chunk)
+            if output_file is not None:
+                output_file.write(chunk)
+    finally:
+        if output_file is not None:
+            output_file.close()
+    return length, checksum.hexdigest()
 
+def combine_pull_csvs_into_one(repo):
+    with open(get_combined_csvs_file_path(), "ab") as big_csv_file:
+        for chunk in _get_combined_csv_chunks_for(get_stage_01_csv_paths_for(repo)):
+            big_csv_file.write(chunk)
     return
 
-# Ensure that all repos have been properly collected
+def _read_manifest():
+    try:
+        with open(get_combined_csvs_manifest_path(), "r", encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return list()
+
+def _write_manifest(manifest):
+    manifest_path = get_combined_csvs_manifest_path()
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=1)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+# Ensure that all repos have been properly collected. The repos are checked in parallel, and only the part of the
+# combined file from the first repo whose stage_01 CSVs changed onward is written again
 def combine_all_pr_csvs():
-    initialize_combined_csvs_file()
     repo_lines = list(
         map(str.strip, open(collected_repos_path, 'r').readlines()))  # strip all \n and place each line in a list
+    repos = [repo for repo in repo_lines if repo.startswith("/")]
+    csv_path_lists = [get_stage_01_csv_paths_for(repo) for repo in repos]
 
-    for repo in repo_lines:
+    def get_checksum(csv_path_list):
         try:
-            print("combining PRs from " + repo + "...")
-            if not repo.startswith("/"):
-                continue
-            else:
-                combine_pull_csvs_into_one(repo)
-        except Exception:
-            print(repo)
-        print("\nCombination of repos into singular CSV file complete!")
+            return _copy_combined_csv_rows(csv_path_list)[1]
+        except Exception as error:
+            print(error)
+            return None
+
+    print("Checking the PR CSVs of " + str(len(repos)) + " repos...")
+    with ThreadPoolExecutor(COMBINE_THREADS) as pool:
+        checksums = list(pool.map(get_checksum, csv_path_lists))
+
+    massive_csv_file_path = get_combined_csvs_file_path()
+    manifest = _read_manifest()
+    if not manifest or not os.path.isfile(massive_csv_file_path):
+        kept_end = initialize_combined_csvs_file()
+        manifest = list()
+    else:
+        kept_end = manifest[0]["start"]
+    combined_size = os.path.getsize(massive_csv_file_path)
+    kept_repos = 0
+    while (kept_repos < min(len(repos), len(manifest)) and manifest[kept_repos]["repo"] == repos[kept_repos] and
+           manifest[kept_repos]["checksum"] == checksums[kept_repos] and
+           manifest[kept_repos]["start"] == kept_end and manifest[kept_repos]["end"] <= combined_size):
+        kept_end = manifest[kept_repos]["end"]
+        kept_repos += 1
+    if kept_repos == len(repos) == len(manifest) and kept_end == combined_size:
+        print("\nNo PR CSVs changed, the combined CSV file is up to date!")
+        return
+
+    # Write the parts of the remaining repos side by side, then put them in place after the parts we keep
+    manifest = manifest[:kept_repos]
+    with tempfile.TemporaryDirectory(dir=targetManager.get_important_csv_files_path()) as segments_path:
+        def write_segment(index):
+            print("combining PRs from " + repos[index] + "...")
+            try:
+                return _copy_combined_csv_rows(csv_path_lists[index], os.path.join(segments_path, str(index)))
+            except Exception as error:
+                print(repos[index] + " " + str(error))
+                return None
+
+        with ThreadPoolExecutor(COMBINE_THREADS) as pool:
+            segments = list(pool.map(write_segment, range(kept_repos, len(repos))))
+
+        with open(massive_csv_file_path, "r+b") as big_csv_file:
+            big_csv_file.truncate(kept_end)
+            big_csv_file.seek(kept_end)
+            for index, segment in zip(range(kept_repos, len(repos)), segments):
+                if segment is None:
+                    continue
+                with open(os.path.join(segments_path, str(index)), "rb") as segment_file:
+                    shutil.copyfileobj(segment_file, big_csv_file, COPY_BUFFER_SIZE)
+                manifest.append({"repo": repos[index], "start": kept_end, "end": kept_end + segment[0],
+                                 "checksum": segment[1]})
+                kept_end += segment[0]
+    _write_manifest(manifest)
+    print("\nCombination of repos into singular CSV file complete!")
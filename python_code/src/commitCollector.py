@@ -8,6 +8,8 @@ import time
 import github
 import researchToolkit
 from logger import Logger
+from checkpointJournal import CHECKPOINT_JOURNAL
+import checkpointJournal
 from targetManager import TargetManager
 
 HOME_PATH = os.getcwd()
@@ -38,28 +40,35 @@ def run_collector(repo):
 
         # set up and call the threads
         INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Starting to download JSON" + get_time_string(start_time))
-        github.download_commit_level_jsons(repo)
-        INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Finished downloading JSON" + get_time_string(start_time))
-
-        # Parse the downloaded main_pull.json files and create a pull_request dictionary, then refine it.
-        INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Starting to make the CSVs" + get_time_string(start_time))
+        # Commits already downloaded (by an interrupted run, or while the PRs were downloading) are not downloaded again
+        finished_pull_items = CHECKPOINT_JOURNAL.get_finished_items(repo, checkpointJournal.COMMITS)
+        pull_ids = [pull_info for pull_info in github.get_pull_ids_list_from_repo(repo)
+                    if checkpointJournal.get_pull_item(pull_info) not in finished_pull_items]
 
-        '''
-            step 3 download the commits
-        '''
+        def on_commits_downloaded(pull_info):
+            CHECKPOINT_JOURNAL.record_item_finished(repo, checkpointJournal.COMMITS,
+                                                    checkpointJournal.get_pull_item(pull_info))
 
-        '''
-            step 4, make csvs
-        '''
-
-        '''
-            log every thing 
-        '''
+        failed_pull_ids = github.download_commit_level_jsons(repo, pull_ids, on_commits_downloaded)
+        INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Finished downloading JSON" + get_time_string(start_time))
 
+        # Count the commits of every author from the downloaded commit pages, then write them to the CSVs
+        INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Starting to make the CSVs" + get_time_string(start_time))
+        author_dict = researchToolkit.get_commit_author_dictionary(repo)
+        researchToolkit.write_commit_author_csv_files(repo, author_dict)
+        INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Finished making the CSVs" + get_time_string(start_time))
 
-        return
+        # A PR whose commits still failed after MAX_DOWNLOAD_ATTEMPTS keeps the phase unfinished, so the next run asks
+        # for them again
+        if failed_pull_ids:
+            INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "The commits of " + str(len(failed_pull_ids)) + " PRs of " +
+                                     repo + " failed to download, the next run will try them again" +
+                                     get_time_string(start_time))
+            return False
+        return True
     except Exception as error:
         ERROR_LOGGER.write_to_log("commitCollector had an error " + str(error) + " with this repo " + str(repo))
+        return False
 
 
 #run_collector("/php/php-src")
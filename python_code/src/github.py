@@ -7,15 +7,23 @@
 #          from GitHub's api.
 
 from requests.auth import HTTPBasicAuth
+from requests.adapters import HTTPAdapter
 from termcolor import colored
 from targetManager import TargetManager
 import requests
+import aiohttp
+import asyncio
 import json
 import os
+import re
 import threading
-from queue import Queue
-import time
 from logger import Logger
+from rateLimitScheduler import RateLimitScheduler
+import rateLimitScheduler
+import storageBackend
+import writeBehindWriter
+import userCache
+import checkpointJournal
 
 # Each valid account allows us access to 5,000 requests per hour. Total requests per hour permitted: 30,000
 targetManager = TargetManager(os.getcwd())
@@ -32,6 +40,7 @@ github_accounts = {
         7: ['GithubFake08', 'PO11sd*^%$']}
 
 num_accounts = len(github_accounts)
+RATE_LIMIT_SCHEDULER = RateLimitScheduler(github_accounts.keys())
 
 headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) \
             AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36'}
@@ -40,19 +49,73 @@ proxies = {'http': 'http://<username>:<password>@107.182....:<port>'}
 
 payload = {'page': '1', 'per_page': '100'}
 pull_payload = {'page': '1', 'per_page': '100','sort': 'created', 'order': 'desc'}
+pull_listing_payload = {'state': 'all', 'page': '1', 'per_page': '100', 'sort': 'created', 'direction': 'desc'}
 
 REQUEST_URL = "https://api.github.com/search/repositories?q=stars:%3E=15000"
 
+# The download engine keeps at most this many requests in flight at once, shared by every caller
+DOWNLOAD_CONCURRENCY = 100
+MAX_DOWNLOAD_ATTEMPTS = 5
+
+# Re-runs send If-None-Match / If-Modified-Since for files we already have, and keep the file when GitHub answers 304.
+# The ETag and Last-Modified of every download are kept next to the file, in <file name> + VALIDATORS_SUFFIX
+CONDITIONAL_REQUESTS = True
+VALIDATORS_SUFFIX = ".validators"
+
+# Store response bodies byte for byte as GitHub sent them, instead of parsing them and writing them out again. With
+# VALIDATE_RAW_RESPONSES a body that is not valid JSON is refused (and downloaded again) before it is stored
+RAW_RESPONSE_WRITES = True
+VALIDATE_RAW_RESPONSES = False
+
+# With PROJECT_PULL_REQUEST_FIELDS, main_pull.json keeps only these fields of the PR (dotted names reach into nested
+# objects) instead of the full payload. The default is what get_pull_request_dictionary_stage_01 reads. The full
+# payload of a PR is still one get_full_pull_request() call away
+PROJECT_PULL_REQUEST_FIELDS = False
+PULL_REQUEST_FIELDS = ["user.login", "user.id", "number", "state", "created_at", "closed_at", "review_comments",
+                       "commits", "additions", "deletions", "changed_files"]
+
+# The GraphQL pull request downloader asks for this many PRs per query (GitHub allows at most 100 nodes per connection).
+# GRAPHQL_URL can be pointed at a local stand-in server
+GRAPHQL_URL = "https://api.github.com/graphql"
+GRAPHQL_BATCH_SIZE = 100
+GRAPHQL_PULL_REQUEST_FIELDS = """
+fragment PullRequestFields on PullRequest {
+    number
+    state
+    createdAt
+    closedAt
+    additions
+    deletions
+    changedFiles
+    author { __typename login ... on User { databaseId } ... on Bot { databaseId } }
+    commits { totalCount }
+    reviews(first: 100) { pageInfo { hasNextPage } nodes { comments { totalCount } } }
+}
+"""
+
+# GitHub lists at most 250 commits of a PR, COMMITS_PER_PAGE (the per_page of payload) to a page
+MAX_PULL_REQUEST_COMMITS = 250
+COMMITS_PER_PAGE = 100
+
+# Every account keeps its own keep-alive connection pool of this size, for both the blocking and the async requests
+SESSION_POOL_SIZE = 100
+
+_download_loop = None
+_download_loop_lock = threading.Lock()
+_download_semaphore = None
+_account_sessions = dict()
+_account_sessions_lock = threading.Lock()
+_async_account_sessions = dict()
+
 
 def get_repositories(REPO_CAP):
-    git_user = 0
-    request = check_rate_limit(REQUEST_URL, git_user, payload)
+    request = check_rate_limit(REQUEST_URL, payload)
     num_repos = request.json()["total_count"]
     num_pages = get_number_of_pages(num_repos)
-    write_collected_repos(REPO_CAP, num_pages, git_user)
+    write_collected_repos(REPO_CAP, num_pages)
     return
 
-def write_collected_repos(REPO_CAP, num_pages, git_user):
+def write_collected_repos(REPO_CAP, num_pages):
     target = open(os.path.join(targetManager.get_collected_repos_path(), 'collected_repos2.txt'), 'w')
     target.write("%d" % REPO_CAP + "\n")
     collected_repos = 0
@@ -61,7 +124,7 @@ def write_collected_repos(REPO_CAP, num_pages, git_user):
             break
         payload["page"] = str(page)
 
-        request = check_rate_limit(REQUEST_URL, git_user, payload)
+        request = check_rate_limit(REQUEST_URL, payload)
 
         for repo in request.json()["items"]:
             if collected_repos == REPO_CAP:
@@ -79,29 +142,37 @@ def get_number_of_pages(num_repos):
     return abs(int(-num_repos//100))
 
 def _get_request_url(git_user, api_url,params):
-    r = requests.get(api_url, auth=HTTPBasicAuth( github_accounts[git_user][0], github_accounts[git_user][1]),
-                    proxies=proxies, headers=headers, params=params)
+    r = _get_account_session(git_user).get(api_url, params=params)
     return r
 
-def check_rate_limit(api_url, git_user, params):
-    try:
+# One persistent session per entry in github_accounts, so repeated calls reuse an open connection to the API
+def _get_account_session(git_user):
+    with _account_sessions_lock:
+        if git_user not in _account_sessions:
+            session = requests.Session()
+            session.auth = HTTPBasicAuth(github_accounts[git_user][0], github_accounts[git_user][1])
+            session.headers.update(headers)
+            session.proxies.update(proxies)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SESSION_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _account_sessions[git_user] = session
+    return _account_sessions[git_user]
+
+# Send the request with whichever account RATE_LIMIT_SCHEDULER says has the most budget left for it, sending it again
+# if GitHub refused it because of a rate limit
+def check_rate_limit(api_url, params):
+    resource = RateLimitScheduler.get_resource_for(api_url)
+    while True:
+        git_user = RATE_LIMIT_SCHEDULER.wait_for_account(resource)
         request = _get_request_url(git_user, api_url, params)
-        while int(request.headers['X-RateLimit-Remaining']) <= 1: # <=1 because we have more requests to do still
-            git_user = (git_user + 1) % num_accounts
-            request = _get_request_url(git_user, api_url, params)
-        return request
-    except KeyError:
-        if not threading.current_thread().isDaemon():
-            print("==========================================================================\n\n")
-            print(" X Rate-Limit Reached. MAIN THREAD is waiting for the Rate-Limit to reset.")
-            print("\n\n==========================================================================")
-        time.sleep(60)
-        return check_rate_limit(api_url, git_user, params)
+        if RATE_LIMIT_SCHEDULER.record_response(git_user, resource, request.status_code, request.headers,
+                                                request.content):
+            return request
 
 def get_api_page(api_url, page_number):
     payload["page"] = str(page_number)
-    git_user = 0
-    request = check_rate_limit(api_url, git_user, payload)
+    request = check_rate_limit(api_url, payload)
     if request.status_code != 200:
         ERROR_LOGGER.write_to_log("This API_URL " + str(api_url) + " with page number " + str(page_number) + " has this error " + str(request.status_code) + " THE METHOD CALLER IS GET_API_PAGE")
         print(colored("CODE: " + str(request.status_code), "red"))
@@ -111,264 +182,611 @@ def get_api_page(api_url, page_number):
         print(request.json())
     return request
 
-def download_api_page_json(api_url, page_number, output_name):
-    with open(output_name, 'w', encoding='utf-8') as f:
-        request = (get_api_page(api_url, page_number))
-        data = request.json()
-        json.dump(data, f,sort_keys=True)
-        f.close()
-    return request.status_code
-
 # Return the number of pull requests that are closed, and merged in a given repository
-def get_closed_merged_pull_nums(repo_info):
-    git_user = 0
-    url = 'https://api.github.com/search/issues?q=is:pr+is:closed+is:merged+repo:' + repo_info[1:]
-    request = check_rate_limit(url,git_user, payload)
+def get_closed_merged_pull_nums(repo_info, updated_since=None):
+    url = ('https://api.github.com/search/issues?q=is:pr+is:closed+is:merged+repo:' + repo_info[1:] +
+           _get_updated_since_qualifier(updated_since))
+    request = check_rate_limit(url, payload)
     return int(request.json()["total_count"])
 
 # Return the number of pull requests that are closed, and unmerged in a given repository
-def get_closed_unmerged_pull_nums(repo_info):
-    git_user = 0
-    url = 'https://api.github.com/search/issues?q=is:pr+is:closed+is:unmerged+repo:' + repo_info[1:]
-    request = check_rate_limit(url, git_user, payload)
+def get_closed_unmerged_pull_nums(repo_info, updated_since=None):
+    url = ('https://api.github.com/search/issues?q=is:pr+is:closed+is:unmerged+repo:' + repo_info[1:] +
+           _get_updated_since_qualifier(updated_since))
+    request = check_rate_limit(url, payload)
     return int(request.json()["total_count"])
 
 # Return the number of pull requests that are closed and open in a given repository
-def get_open_pull_nums(repo_info):
-    git_user = 0
-    url = 'https://api.github.com/search/issues?q=is:pr+is:open+repo:' + repo_info[1:]
-    request = check_rate_limit(url, git_user, payload)
+def get_open_pull_nums(repo_info, updated_since=None):
+    url = ('https://api.github.com/search/issues?q=is:pr+is:open+repo:' + repo_info[1:] +
+           _get_updated_since_qualifier(updated_since))
+    request = check_rate_limit(url, payload)
     return int(request.json()["total_count"])
 
-def git_pull_ids_open(repo):
+# Return the number of pull requests, in any state, in a given repository
+def get_all_pull_nums(repo_info):
+    request = check_rate_limit('https://api.github.com/search/issues?q=is:pr+repo:' + repo_info[1:], payload)
+    return int(request.json()["total_count"])
+
+# Narrow a pull request search down to the PRs created or updated after updated_since (an ISO 8601 UTC timestamp)
+def _get_updated_since_qualifier(updated_since):
+    if updated_since is None:
+        return ""
+    return "+updated:>" + updated_since
+
+def git_pull_ids_open(repo, updated_since=None):
     print("\nCollecting OPEN Pull IDs From Github API. This may take a few minutes...")
-    original_url = "https://api.github.com/search/issues?q=is:pr+is:open+repo:" + repo[1:]
-    pulls_num = get_open_pull_nums(repo)
+    original_url = ("https://api.github.com/search/issues?q=is:pr+is:open+repo:" + repo[1:] +
+                    _get_updated_since_qualifier(updated_since))
+    pulls_num = get_open_pull_nums(repo, updated_since)
     return _get_pull_ids(original_url, pulls_num)
 
-def git_pull_ids_merged(repo):
+def git_pull_ids_merged(repo, updated_since=None):
     print("\nCollecting MERGED Pull IDs From Github API. This may take a few minutes...")
-    original_url = "https://api.github.com/search/issues?q=is:pr+is:closed+is:merged+repo:" + repo[1:]
-    pulls_num = get_closed_merged_pull_nums(repo)
+    original_url = ("https://api.github.com/search/issues?q=is:pr+is:closed+is:merged+repo:" + repo[1:] +
+                    _get_updated_since_qualifier(updated_since))
+    pulls_num = get_closed_merged_pull_nums(repo, updated_since)
     return _get_pull_ids(original_url, pulls_num)
 
-def git_pull_ids_unmerged(repo):
+def git_pull_ids_unmerged(repo, updated_since=None):
     print("\nCollecting UNMERGED Pull IDs From Github API. This may take a few minutes...")
-    original_url = "https://api.github.com/search/issues?q=is:pr+is:closed+is:unmerged+repo:" + repo[1:]
-    pulls_num = get_closed_unmerged_pull_nums(repo)
+    original_url = ("https://api.github.com/search/issues?q=is:pr+is:closed+is:unmerged+repo:" + repo[1:] +
+                    _get_updated_since_qualifier(updated_since))
+    pulls_num = get_closed_unmerged_pull_nums(repo, updated_since)
     return _get_pull_ids(original_url, pulls_num)
 
 def _get_pull_ids(url,pulls_num):
-    original_url = url
+    pull_ids = _run_on_download_loop(_async_get_pull_ids(url, pulls_num))
+    print("Finished Collecting IDs From Github API.")
+    return pull_ids
+
+# The Search API only serves 1000 results (10 pages) per query, so the results are walked in windows of 10 pages, each
+# window ending where the previous one's last PR was created. All pages of a window are requested at once, and the next
+# window starts as soon as the current window's last page arrives
+async def _async_get_pull_ids(url, pulls_num):
+    search_url, query = url.split("?q=")
+    query = query.replace("+", " ")
+    remaining_pages = abs(pulls_num // (-100))
+    window_query = query
+    page_tasks = []
+    while remaining_pages > 0:
+        window_pages = min(10, remaining_pages)
+        window_tasks = [asyncio.ensure_future(_async_get_search_page(search_url, window_query, page_num))
+                        for page_num in range(1, window_pages + 1)]
+        page_tasks.extend(window_tasks)
+        remaining_pages -= window_pages
+        if remaining_pages > 0:
+            last_page_items = (await window_tasks[-1]).get("items")
+            if not last_page_items:
+                break
+            window_query = query + " created:<" + last_page_items[-1]["created_at"]
+
     pull_ids = []
-    git_user = 0
-    collected_ids = 0
-    num_pages = abs(pulls_num // (-100))
-    page_num = 1
-    for page in range(1, num_pages + 1):
-        if page_num > 10:
-            page_num = 1
-        pull_payload["page"] = str(page_num)
-        page_num += 1
-        request = check_rate_limit(url, git_user, pull_payload)
-        request = request.json()
-        for pull_request in request["items"]:
+    for page in await asyncio.gather(*page_tasks):
+        for pull_request in page.get("items", []):
             pull_ids.append(str(pull_request["url"]).split("/")[-1])
-            collected_ids += 1
-            if collected_ids % 1000 == 0:
-                url = original_url
-                url += ("+created:<" + pull_request["created_at"])
-    print("Finished Collecting IDs From Github API.")
     return pull_ids
+
+async def _async_get_search_page(search_url, query, page_num):
+    params = dict(pull_payload)
+    params["q"] = query
+    params["page"] = str(page_num)
+    response = await async_check_rate_limit(search_url, params)
+    if response.status_code != 200:
+        ERROR_LOGGER.write_to_log("This search " + str(query) + " with page number " + str(page_num) + " has this "
+                                  "error " + str(response.status_code) + " THE METHOD CALLER IS _ASYNC_GET_SEARCH_PAGE")
+    return response.json()
  
+# Walk /repos/{repo}/pulls?state=all once and sort every PR into (merged, unmerged, open) lists of ids. Unlike the
+# search queries above this has no 1000 result ceiling, and it is counted against the core rate limit. With
+# updated_since, the listing is walked most recently updated first and stops at the first PR not updated since then
+def git_pull_ids_all_states(repo, updated_since=None):
+    print("\nCollecting ALL Pull IDs From Github API. This may take a few minutes...")
+    merged_pull_ids = []
+    unmerged_pull_ids = []
+    open_pull_ids = []
+    url = "https://api.github.com/repos" + repo + "/pulls"
+    params = dict(pull_listing_payload)
+    if updated_since is not None:
+        params["sort"] = "updated"
+    while url:
+        request = check_rate_limit(url, params)
+        if request.status_code != 200:
+            ERROR_LOGGER.write_to_log("This API_URL " + str(url) + " has this error " + str(request.status_code) +
+                                      " THE METHOD CALLER IS GIT_PULL_IDS_ALL_STATES")
+            break
+        for pull_request in request.json():
+            if updated_since is not None and pull_request["updated_at"] <= updated_since:
+                url = None
+                break
+            if pull_request["state"] == "open":
+                open_pull_ids.append(str(pull_request["number"]))
+            elif pull_request["merged_at"] is not None:
+                merged_pull_ids.append(str(pull_request["number"]))
+            else:
+                unmerged_pull_ids.append(str(pull_request["number"]))
+        if url is not None:
+            url = request.links.get("next", {}).get("url")
+        params = None  # the next link already carries every query parameter
+    print("Finished Collecting IDs From Github API.")
+    return merged_pull_ids, unmerged_pull_ids, open_pull_ids
+
 def get_pull_ids_list_from_repo(repo):
     complete_pull_ids = list()
-    pull_paths = list()
-    open_pulls_path = targetManager.get_json_pulls_open_file_path_to(repo)
-    merged_pulls_path = targetManager.get_json_pulls_merged_file_path_to(repo)
-    unmerged_pulls_path = targetManager.get_json_pulls_unmerged_file_path_to(repo)
-    pull_paths.append(open_pulls_path)
-    pull_paths.append(merged_pulls_path)
-    pull_paths.append(unmerged_pulls_path)
-    for pull_state_path in pull_paths:
-        pull_ids = [dI for dI in os.listdir(pull_state_path) if os.path.isdir(os.path.join(pull_state_path, dI))]
+    for pull_state in [storageBackend.OPEN, storageBackend.MERGED, storageBackend.UNMERGED]:
+        for pull_id in storageBackend.get_storage().list_pull_ids(repo, pull_state):
+            complete_pull_ids.append([pull_state, pull_id])
+    return complete_pull_ids
+
+# The [pull state, pull id] pairs of only the given PRs, for downloads that should not touch the rest of the repo
+def get_pull_ids_list_for(repo, merged_pull_ids, unmerged_pull_ids, open_pull_ids):
+    complete_pull_ids = list()
+    pull_ids_by_state = [[storageBackend.OPEN, open_pull_ids],
+                         [storageBackend.MERGED, merged_pull_ids],
+                         [storageBackend.UNMERGED, unmerged_pull_ids]]
+    for pull_state, pull_ids in pull_ids_by_state:
         for pull_id in pull_ids:
-            complete_pull_ids.append([pull_state_path, pull_id])
+            complete_pull_ids.append([pull_state, str(pull_id)])
     return complete_pull_ids
 
 # Pass in the associated repository and pull request state (OPEN, MERGED, or UNMERGED) to download each PR's json file.
+# Pass pull_ids (see get_pull_ids_list_for) to download only those PRs instead of every PR folder of the repo, and
+# on_pull_downloaded to be told about every [pull state, pull id] whose main_pull.json has been written.
 # NOTE: THIS FUNCTION MUST BE CALLED ONLY AFTER targetManager.create_pull_request_id_folders() HAS BEEN CALLED
-def download_pull_requests(repo):
-    PULL_REQUEST_QUEUE = Queue()
-    pull_request_level_thread_list = []
-    pill2kill = threading.Event()
-    pull_ids = get_pull_ids_list_from_repo(repo)
-
-    for pull_info in pull_ids:
-        PULL_REQUEST_QUEUE.put(pull_info)
-
-    for newThread in range(100):
-        thread = threading.Thread(target = kickoff_pull_request_level_thread_queue, args = [[repo, PULL_REQUEST_QUEUE, pill2kill]])
-        thread.daemon = True
-        pull_request_level_thread_list.append(thread)
-        thread.start()
-
-    PULL_REQUEST_QUEUE.join()
-
-    time.sleep(1)
-    for thread in pull_request_level_thread_list:
-        thread.join()
+def download_pull_requests(repo, pull_ids=None, on_pull_downloaded=None):
+    if pull_ids is None:
+        pull_ids = get_pull_ids_list_from_repo(repo)
+    _run_on_download_loop(_run_download_jobs(pull_ids, repo, pull_request_level_download_job, on_pull_downloaded))
     return
 
-def kickoff_pull_request_level_thread_queue(data):
-    while True: # this looks like it can brake everything omg
-        if data[1].empty():
-            return
-        pull_info = data[1].get()
-        pull_request_level_thread_job(pull_info, data[0], data[1])
-        data[1].task_done()
-
-def pull_request_level_thread_job(pull_info, repo, PULL_REQUEST_QUEUE):
-    try:
-        original_url = "\nhttps://api.github.com/repos" + repo + "/pulls/" + pull_info[1]
-        output_path = os.path.join(pull_info[0], pull_info[1])
-        output_name = os.path.join(output_path, "main_pull.json")
-        download_api_page_json(original_url, 1, output_name)
-        print("Downloaded [%s json..." % (str(pull_info).split("\\")[-1].upper()))
-    except Exception as e:
-        print(e)
-        PULL_REQUEST_QUEUE.put(pull_info)
-
-def download_commit_level_jsons(repo):
-    COMMIT_LEVEL_QUEUE = Queue()
-    commit_level_thread_list = []
-    pill2kill = threading.Event()
-
-    pull_ids = get_pull_ids_list_from_repo(repo)
-
-    for pull_info in pull_ids:
-        COMMIT_LEVEL_QUEUE.put(pull_info)
-
-    for newThread in range(100):
-        commit_level_thread = threading.Thread(target=kickoff_commit_level_thread_queue,
-                                  args=[[repo, COMMIT_LEVEL_QUEUE, pill2kill]])
-        commit_level_thread.daemon = True
-        commit_level_thread_list.append(commit_level_thread)
-        commit_level_thread.start()
-
-    COMMIT_LEVEL_QUEUE.join()
-
-    time.sleep(1)
-    for commit_level_thread in commit_level_thread_list:
-        commit_level_thread.join()
+async def pull_request_level_download_job(pull_info, repo):
+    original_url = "https://api.github.com/repos" + repo + "/pulls/" + pull_info[1]
+    storage_key = (repo, pull_info[0], pull_info[1], storageBackend.MAIN_PULL_JSON)
+    fields = PULL_REQUEST_FIELDS if PROJECT_PULL_REQUEST_FIELDS else None
+    response = await async_download_api_page_json(original_url, 1, storage_key, fields)
+    if response.status_code not in (200, 304):
+        return False
+    print("Downloaded [%s %s json..." % (pull_info[0].upper(), pull_info[1]))
+    return True
+
+# The complete REST payload of a PR, for when a projected main_pull.json does not have the field you need
+def get_full_pull_request(repo, pull_id):
+    return get_api_page("https://api.github.com/repos" + repo + "/pulls/" + str(pull_id), 1).json()
+
+# Keep only the given fields of a payload, e.g. ["user.login", "number"] -> {"user": {"login": ...}, "number": ...}
+def _project_fields(data, fields):
+    projection = dict()
+    for field in fields:
+        value = data
+        for name in field.split("."):
+            value = value.get(name) if isinstance(value, dict) else None
+        target = projection
+        names = field.split(".")
+        for name in names[:-1]:
+            target = target.setdefault(name, dict())
+        target[names[-1]] = value
+    return projection
+
+# download_pull_requests() with the user and commit downloads of every PR overlapped with it: as soon as a PR's
+# main_pull.json is in, its author (unless already queued, or listed in finished_user_IDs) and its commits (unless its
+# checkpointJournal.get_pull_item is in finished_commit_pull_items) are queued for download, on the same engine and rate
+# limit budget
+def download_pull_requests_pipelined(repo, pull_ids=None, on_pull_downloaded=None, on_user_downloaded=None,
+                                     on_commits_downloaded=None, finished_user_IDs=(),
+                                     finished_commit_pull_items=()):
+    if pull_ids is None:
+        pull_ids = get_pull_ids_list_from_repo(repo)
+    _run_on_download_loop(_run_pipelined_download_jobs(pull_ids, repo, on_pull_downloaded, on_user_downloaded,
+                                                       on_commits_downloaded, set(finished_user_IDs),
+                                                       set(finished_commit_pull_items)))
     return
 
-def kickoff_commit_level_thread_queue(data):
-    while True:
-        if data[1].empty():
-            return
-        pull_info = data[1].get()
-        commit_level_thread_job(pull_info, data[0], data[1])
-        data[1].task_done()
-
-def commit_level_thread_job(pull_info, repo, COMMIT_LEVEL_QUEUE):
-    try:
-        original_url = "\nhttps://api.github.com/repos" + repo + "/pulls/" + pull_info[1] + "/commits"
-        output_path = os.path.join(pull_info[0], pull_info[1])
-        output_name = os.path.join(output_path, "commit_level.json")
-        output_name = _make_commit_output_name(output_name)
-        download_api_page_json(original_url, 1, output_name)
-        print("Downloaded [%s json..." % (str(pull_info).split("\\")[-1].upper()))
-    except Exception as error:
-        print(error)
-        COMMIT_LEVEL_QUEUE.put(pull_info)
-
-
-def _make_commit_output_name(old_output_name):
-    try:
-        new_path = _make_commit_output_name_mac_version(old_output_name)
-    except Exception:
-        new_path = _make_commit_output_name_windows_version(old_output_name)
-
-    return new_path
-
-
-def _make_commit_output_name_mac_version(old_output_name):
-    new_path = str()
-    temp_str = str(old_output_name).split("/")
-    temp_index = 0
-    for element in temp_str:
-        if element == 'pull_requests':
-            break
-        else:
-            temp_index = temp_index + 1
-    temp_str[temp_index] = 'commits'
-
-    for element in temp_str:
-        new_path = os.path.join(new_path, element)
-
-    return "/" + new_path
-
-
-
-def _make_commit_output_name_windows_version(old_output_name):
-    temp_str = str(old_output_name).split("\\")
-    temp_index = 0
-    for element in temp_str:
-        if element == 'pull_requests':
-            break
+async def _run_pipelined_download_jobs(pull_ids, repo, on_pull_downloaded, on_user_downloaded, on_commits_downloaded,
+                                       queued_user_IDs, finished_commit_pull_items):
+    user_queue = asyncio.Queue()
+    commit_queue = asyncio.Queue()
+
+    async def pipelined_pull_request_download_job(pull_info, repo):
+        storage_key = (repo, pull_info[0], pull_info[1], storageBackend.MAIN_PULL_JSON)
+        fields = PULL_REQUEST_FIELDS if PROJECT_PULL_REQUEST_FIELDS else None
+        response = await async_download_api_page_json("https://api.github.com/repos" + repo + "/pulls/" + pull_info[1],
+                                                       1, storage_key, fields)
+        if response.status_code not in (200, 304):
+            return False
+        if response.status_code == 200:
+            content = response.content
         else:
-            temp_index = temp_index + 1
-    temp_str[temp_index] = 'commits'
-    new_path = temp_str[0] + "\\"
-    for index in range(1, len(temp_str)):
-        new_path = os.path.join(new_path, temp_str[index])
-    return new_path
-
-
-
-def download_user_data(users_set,repo):
-    PULL_REQUEST_QUEUE = Queue()
-    pull_request_level_thread_list = []
-
-    for user in users_set:
-        PULL_REQUEST_QUEUE.put(user)
-
-    for newThread in range(100):
-        thread = threading.Thread(target = _kickoff_user_thread_queue, args = [[PULL_REQUEST_QUEUE, repo]])
-        thread.daemon = True
-        pull_request_level_thread_list.append(thread)
-        thread.start()
-
-    PULL_REQUEST_QUEUE.join()
-
-    time.sleep(1)
-    for thread in pull_request_level_thread_list:
-        thread.join()
+            content = await _run_blocking(storageBackend.get_storage().get, *storage_key)
+        pull_request = json.loads(content.decode('utf-8'))
+        user_ID = str(pull_request["user"]["id"])
+        print("Downloaded [%s %s json..." % (pull_info[0].upper(), pull_info[1]))
+        if user_ID not in queued_user_IDs:
+            queued_user_IDs.add(user_ID)
+            user_queue.put_nowait(user_ID)
+        # its main_pull.json may not be stored yet, pass the count
+        if checkpointJournal.get_pull_item(pull_info) not in finished_commit_pull_items:
+            commit_queue.put_nowait(pull_info + [pull_request["commits"]])
+        return True
+
+    queue_workers = [_download_queue_worker(user_queue, repo, _pull_user_download_job, on_user_downloaded)
+                     for worker in range(DOWNLOAD_CONCURRENCY)]
+    queue_workers += [_download_queue_worker(commit_queue, repo, commit_level_download_job, on_commits_downloaded)
+                      for worker in range(DOWNLOAD_CONCURRENCY)]
+    queue_workers = [asyncio.ensure_future(queue_worker) for queue_worker in queue_workers]
+    await _run_download_jobs(pull_ids, repo, pipelined_pull_request_download_job, on_pull_downloaded)
+    for worker in range(DOWNLOAD_CONCURRENCY):  # no more PRs, so the user and commit workers stop once they run dry
+        user_queue.put_nowait(None)
+        commit_queue.put_nowait(None)
+    await asyncio.gather(*queue_workers)
+    await asyncio.get_event_loop().run_in_executor(None, writeBehindWriter.get_write_behind_writer().flush)
+
+# The GraphQL alternative to download_pull_requests(). It fetches GRAPHQL_BATCH_SIZE PRs per request, and writes each
+# main_pull.json with only the fields get_pull_request_dictionary_stage_01 reads, named as in the REST API
+def download_pull_requests_graphql(repo, pull_ids=None, on_pull_downloaded=None):
+    if pull_ids is None:
+        pull_ids = get_pull_ids_list_from_repo(repo)
+    pull_id_batches = [pull_ids[index:index + GRAPHQL_BATCH_SIZE] for index in range(0, len(pull_ids), GRAPHQL_BATCH_SIZE)]
+
+    def on_batch_downloaded(pull_id_batch):
+        for pull_info in pull_id_batch:
+            on_pull_downloaded(pull_info)
+
+    _run_on_download_loop(_run_download_jobs(pull_id_batches, repo, pull_request_batch_graphql_download_job,
+                                             on_batch_downloaded if on_pull_downloaded else None))
     return
 
-
-def _kickoff_user_thread_queue(data):
+async def pull_request_batch_graphql_download_job(pull_id_batch, repo):
+    owner, name = repo[1:].split("/")
+    aliases = ["pr_" + pull_info[1] + ": pullRequest(number: " + pull_info[1] + ") { ...PullRequestFields }"
+               for pull_info in pull_id_batch]
+    query = ("query($owner: String!, $name: String!) { repository(owner: $owner, name: $name) { " +
+             " ".join(aliases) + " } }" + GRAPHQL_PULL_REQUEST_FIELDS)
+    response = await async_send_graphql_query(query, {"owner": owner, "name": name})
+    data = response.json()
+    if response.status_code != 200 or not data.get("data") or not data["data"].get("repository"):
+        ERROR_LOGGER.write_to_log("This GraphQL batch of " + str(len(pull_id_batch)) + " PRs for " + str(repo) +
+                                  " has this error " + str(response.status_code) + " " + str(data.get("errors")) +
+                                  " THE METHOD CALLER IS PULL_REQUEST_BATCH_GRAPHQL_DOWNLOAD_JOB")
+        return False
+
+    # A PR GraphQL did not return, or with more reviews than one query lists, is downloaded with REST instead
+    rest_pull_ids = list()
+    for pull_info in pull_id_batch:
+        pull_request = data["data"]["repository"].get("pr_" + pull_info[1])
+        if pull_request is None:
+            ERROR_LOGGER.write_to_log("This PR " + str(pull_info[1]) + " for " + str(repo) + " was not returned by "
+                                      "GraphQL THE METHOD CALLER IS PULL_REQUEST_BATCH_GRAPHQL_DOWNLOAD_JOB")
+            rest_pull_ids.append(pull_info)
+            continue
+        if pull_request["reviews"]["pageInfo"]["hasNextPage"]:
+            rest_pull_ids.append(pull_info)
+            continue
+        storage_key = (repo, pull_info[0], pull_info[1], storageBackend.MAIN_PULL_JSON)
+        content = json.dumps(_convert_graphql_pull_request_to_rest(pull_request), sort_keys=True)
+        await writeBehindWriter.get_write_behind_writer().async_put(*storage_key, content.encode('utf-8'))
+        await _remove_cache_validators(storage_key)  # a GraphQL answer can not be revalidated with REST
+    rest_results = await asyncio.gather(*[pull_request_level_download_job(pull_info, repo)
+                                          for pull_info in rest_pull_ids])
+    print("Downloaded %d PRs with GraphQL..." % (len(pull_id_batch) - len(rest_pull_ids)))
+    return all(rest_results)
+
+# Name the GraphQL fields the way the REST API does, so the stage_01 builder can not tell the difference
+def _convert_graphql_pull_request_to_rest(pull_request):
+    author = pull_request["author"]
+    if author is None:  # REST reports deleted accounts as GitHub's "ghost" user
+        author = {"login": "ghost", "databaseId": 10137}
+    login = author["login"]
+    if author.get("__typename") == "Bot":  # REST names bots e.g. dependabot[bot], GraphQL just dependabot
+        login += "[bot]"
+    return {"user": {"login": login, "id": author.get("databaseId")},
+            "number": pull_request["number"],
+            "state": "open" if pull_request["state"] == "OPEN" else "closed",
+            "created_at": pull_request["createdAt"],
+            "closed_at": pull_request["closedAt"],
+            "review_comments": sum(review["comments"]["totalCount"] for review in pull_request["reviews"]["nodes"]),
+            "commits": pull_request["commits"]["totalCount"],
+            "additions": pull_request["additions"],
+            "deletions": pull_request["deletions"],
+            "changed_files": pull_request["changedFiles"]}
+
+# Pass pull_ids to download the commits of only those PRs, and on_commits_downloaded to be told about every
+# [pull state, pull id] whose commit_level.json has been written. Returns the [pull state, pull id]s whose commits still
+# failed after MAX_DOWNLOAD_ATTEMPTS
+def download_commit_level_jsons(repo, pull_ids=None, on_commits_downloaded=None):
+    if pull_ids is None:
+        pull_ids = get_pull_ids_list_from_repo(repo)
+    return _run_on_download_loop(_run_download_jobs(pull_ids, repo, commit_level_download_job, on_commits_downloaded))
+
+# Download every page of the PR's commits at once. The number of pages comes from the "commits" count of its
+# main_pull.json (or a third item of pull_info, when the PR was just downloaded), else from the Link header of page 1,
+# or from the pages stored last time when page 1 has not changed (a 304 may come without a Link header)
+async def commit_level_download_job(pull_info, repo):
+    original_url = "https://api.github.com/repos" + repo + "/pulls/" + pull_info[1] + "/commits"
+    if len(pull_info) > 2:
+        commit_count = pull_info[2]
+    else:
+        commit_count = await _run_blocking(_get_stored_commit_count, repo, pull_info)
+    if commit_count is None:
+        first_page = await async_download_api_page_json(original_url, 1, _get_commit_page_key(repo, pull_info, 1))
+        if first_page.status_code == 304:
+            page_count = await _run_blocking(_get_stored_commit_page_count, repo, pull_info)
+        else:
+            page_count = _get_last_page_number(first_page)
+        responses = [first_page] + await asyncio.gather(*[
+            async_download_api_page_json(original_url, page_number, _get_commit_page_key(repo, pull_info, page_number))
+            for page_number in range(2, page_count + 1)])
+    else:
+        page_count = max(1, -(-min(commit_count, MAX_PULL_REQUEST_COMMITS) // COMMITS_PER_PAGE))
+        responses = await asyncio.gather(*[
+            async_download_api_page_json(original_url, page_number, _get_commit_page_key(repo, pull_info, page_number))
+            for page_number in range(1, page_count + 1)])
+    if any(response.status_code not in (200, 304) for response in responses):
+        return False
+
+    # A PR that was force pushed can have fewer pages than last time, drop the pages it no longer has. Only a fresh
+    # page 1 shows that the PR changed, an unchanged one keeps every page it had
+    if responses[0].status_code == 200:
+        await _remove_commit_pages_after(repo, pull_info, page_count)
+    print("Downloaded [%s %s json (%d pages)..." % (pull_info[0].upper(), pull_info[1], page_count))
+    return True
+
+async def _remove_commit_pages_after(repo, pull_info, page_count):
+    for page_number in range(page_count + 1, -(-MAX_PULL_REQUEST_COMMITS // COMMITS_PER_PAGE) + 1):
+        page_key = _get_commit_page_key(repo, pull_info, page_number)
+        if await _run_blocking(storageBackend.get_storage().exists, *page_key):
+            await writeBehindWriter.get_write_behind_writer().async_delete(*page_key)
+            await _remove_cache_validators(page_key)
+
+def _get_commit_page_key(repo, pull_info, page_number):
+    return repo, pull_info[0], pull_info[1], storageBackend.get_commit_page_kind(page_number)
+
+def _get_stored_commit_count(repo, pull_info):
+    try:
+        return int(json.loads(storageBackend.get_storage().get(
+            repo, pull_info[0], pull_info[1], storageBackend.MAIN_PULL_JSON).decode('utf-8'))["commits"])
+    except Exception:
+        return None
+
+# How many commit pages of the PR are stored, counting up from page 1 until one is missing
+def _get_stored_commit_page_count(repo, pull_info):
+    page_count = 1
+    while page_count < -(-MAX_PULL_REQUEST_COMMITS // COMMITS_PER_PAGE) and \
+            storageBackend.get_storage().exists(*_get_commit_page_key(repo, pull_info, page_count + 1)):
+        page_count += 1
+    return page_count
+
+# The page number of the Link header's "last" page, or 1 when there is no further page
+def _get_last_page_number(response):
+    for link in response.headers.get("Link", "").split(","):
+        last_page = re.search(r'[?&]page=(\d+)[^>]*>;\s*rel="last"', link)
+        if last_page:
+            return int(last_page.group(1))
+    return 1
+
+# How many items each API listing has, from one per_page=1 request per listing (the Link header's last page is then the
+# item count), with every listing requested at once. A listing GitHub would not serve counts as None
+def get_api_listing_counts(api_urls):
+    return _run_on_download_loop(_async_get_api_listing_counts(api_urls))
+
+async def _async_get_api_listing_counts(api_urls):
+    return await asyncio.gather(*[_async_get_api_listing_count(api_url) for api_url in api_urls])
+
+async def _async_get_api_listing_count(api_url):
+    response = await async_check_rate_limit(api_url, {'per_page': '1'})
+    if response.status_code == 204:  # e.g. the contributors of an empty repo
+        return 0
+    if response.status_code != 200:
+        ERROR_LOGGER.write_to_log("This API_URL " + str(api_url) + " has this error " + str(response.status_code) +
+                                  " THE METHOD CALLER IS _ASYNC_GET_API_LISTING_COUNT")
+        return None
+    if 'rel="last"' not in response.headers.get("Link", ""):
+        return len(response.json())
+    return _get_last_page_number(response)
+
+
+# Returns the user IDs that still failed after MAX_DOWNLOAD_ATTEMPTS
+def download_user_data(users_set,repo, on_user_downloaded=None):
+    return _run_on_download_loop(_run_download_jobs(list(users_set), repo, _pull_user_download_job,
+                                                    on_user_downloaded))
+
+
+# With userCache.USE_GLOBAL_USER_CACHE, a user another repo fetched recently is not requested again
+async def _pull_user_download_job(user_ID, repo):
+    if await _run_blocking(userCache.is_user_fresh, user_ID):
+        return True
+    original_url = "https://api.github.com/user/"
+    storage_key = userCache.get_user_storage_key(user_ID, repo)
+    response = await async_download_api_page_json(original_url + str(user_ID), 1, storage_key)
+    if response.status_code not in (200, 304):
+        return False
+
+    await userCache.record_user_fetched(user_ID)
+    print("Downloaded %s json..." % (str(user_ID).upper()))
+    return True
+
+
+# The download engine runs on one long-lived event loop in a background thread, so every entry point (and every
+# thread calling one) shares the same connections and the same DOWNLOAD_CONCURRENCY budget
+def _get_download_loop():
+    global _download_loop
+    with _download_loop_lock:
+        if _download_loop is None:
+            _download_loop = asyncio.new_event_loop()
+            loop_thread = threading.Thread(target=_download_loop.run_forever, name="download-loop")
+            loop_thread.daemon = True
+            loop_thread.start()
+    return _download_loop
+
+def _run_on_download_loop(coroutine):
+    return asyncio.run_coroutine_threadsafe(coroutine, _get_download_loop()).result()
+
+# Run a blocking call (e.g. a storage read) on an executor thread, so the download loop keeps serving other requests
+async def _run_blocking(function, *args):
+    return await asyncio.get_event_loop().run_in_executor(None, function, *args)
+
+# Only ever called from the download loop, so no locking is needed around the lazy creation
+def _get_download_semaphore():
+    global _download_semaphore
+    if _download_semaphore is None:
+        _download_semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+    return _download_semaphore
+
+# The async twin of _get_account_session, living on the download loop for as long as the program runs
+def _get_async_account_session(git_user):
+    if git_user not in _async_account_sessions:
+        auth = aiohttp.BasicAuth(github_accounts[git_user][0], github_accounts[git_user][1])
+        connector = aiohttp.TCPConnector(limit=SESSION_POOL_SIZE, keepalive_timeout=60)
+        _async_account_sessions[git_user] = aiohttp.ClientSession(auth=auth, headers=headers, connector=connector)
+    return _async_account_sessions[git_user]
+
+# Feed every job item to a fixed number of worker coroutines. A job returns True once its item is finished (and
+# on_job_finished, if given, is called with the item), and is retried (up to MAX_DOWNLOAD_ATTEMPTS) when it returns False
+# or raises. Returns the job items that never finished: every attempt failed, or one of their files was not stored
+async def _run_download_jobs(job_items, repo, download_job, on_job_finished=None):
+    job_iterator = iter(job_items)
+    job_results = list()
+    worker_count = min(DOWNLOAD_CONCURRENCY, len(job_items))
+    await asyncio.gather(*[_download_worker(job_iterator, repo, download_job, on_job_finished, job_results)
+                           for worker in range(worker_count)])
+    # The files are stored by the write behind writer, wait for them before the caller reads them back
+    writer = writeBehindWriter.get_write_behind_writer()
+    await asyncio.get_event_loop().run_in_executor(None, writer.flush)
+    return [job_item for job_item, written_groups in job_results
+            if written_groups is None or writer.has_failed_write(written_groups)]
+
+async def _download_worker(job_iterator, repo, download_job, on_job_finished, job_results):
+    for job_item in job_iterator:
+        job_results.append([job_item, await _run_download_job(job_item, repo, download_job, on_job_finished)])
+
+# Like _download_worker, for jobs that are still being added to the queue. A None in the queue stops the worker
+async def _download_queue_worker(job_queue, repo, download_job, on_job_finished):
     while True:
-        if data[0].empty():
+        job_item = await job_queue.get()
+        if job_item is None:
             return
-        user_ID = data[0].get()
-        _pull_user_thread_job(user_ID, data[0],data[1])
-        data[0].task_done()
-
-
-def _pull_user_thread_job(user_ID, PULL_REQUEST_QUEUE,repo):
+        await _run_download_job(job_item, repo, download_job, on_job_finished)
+
+# Returns the groups the job wrote (see writeBehindWriter.record_written_groups), or None when every attempt failed
+async def _run_download_job(job_item, repo, download_job, on_job_finished):
+    for attempt in range(MAX_DOWNLOAD_ATTEMPTS):
+        try:
+            written_groups = writeBehindWriter.record_written_groups()
+            if await download_job(job_item, repo):
+                if on_job_finished is not None:  # only once the job's files have all been stored
+                    writeBehindWriter.get_write_behind_writer().call_when_written(
+                        lambda finished_item=job_item: on_job_finished(finished_item), written_groups)
+                return written_groups
+        except Exception as error:
+            print(error)
+    ERROR_LOGGER.write_to_log("The download of " + str(job_item) + " for " + str(repo) + " failed " +
+                              str(MAX_DOWNLOAD_ATTEMPTS) + " times THE METHOD CALLER IS " +
+                              download_job.__name__.upper())
+    return None
+
+async def _async_get_request_url(git_user, api_url, params, request_headers=None):
+    async with _get_download_semaphore():
+        session = _get_async_account_session(git_user)
+        async with session.get(api_url, params=params, headers=request_headers) as response:
+            content = await response.read()
+            return DownloadResponse(response.status, response.headers, content)
+
+async def async_check_rate_limit(api_url, params, request_headers=None):
+    resource = RateLimitScheduler.get_resource_for(api_url)
+    while True:
+        git_user = await RATE_LIMIT_SCHEDULER.async_wait_for_account(resource)
+        response = await _async_get_request_url(git_user, api_url, params, request_headers)
+        if RATE_LIMIT_SCHEDULER.record_response(git_user, resource, response.status_code, response.headers,
+                                                response.content):
+            return response
+
+async def async_send_graphql_query(query, variables):
+    body = {"query": query, "variables": variables}
+    while True:
+        git_user = await RATE_LIMIT_SCHEDULER.async_wait_for_account(rateLimitScheduler.GRAPHQL)
+        async with _get_download_semaphore():
+            async with _get_async_account_session(git_user).post(GRAPHQL_URL, json=body) as graphql_response:
+                content = await graphql_response.read()
+                response = DownloadResponse(graphql_response.status, graphql_response.headers, content)
+        if RATE_LIMIT_SCHEDULER.record_response(git_user, rateLimitScheduler.GRAPHQL, response.status_code,
+                                                response.headers, response.content):
+            return response
+
+# storage_key is the (repo, state, pull id, kind) the page is kept under by storageBackend. Pass fields to keep only
+# those fields of the page (see _project_fields). Returns the response. Only a 200 is stored: an error body (and its
+# validators) never replaces the file we already have, and the caller is left to download it again
+async def async_download_api_page_json(api_url, page_number, storage_key, fields=None):
+    params = dict(payload)
+    params["page"] = str(page_number)
+    conditional_headers = await _run_blocking(_get_conditional_request_headers, storage_key, fields)
+    response = await async_check_rate_limit(api_url, params, conditional_headers)
+    if response.status_code == 304:
+        return response  # Nothing changed since the last run, keep the file we already have
+    if response.status_code != 200:
+        ERROR_LOGGER.write_to_log("This API_URL " + str(api_url) + " with page number " + str(page_number) + " has this error " + str(response.status_code) + " THE METHOD CALLER IS ASYNC_DOWNLOAD_API_PAGE_JSON")
+        print(colored("CODE: " + str(response.status_code), "red"))
+        return response
+    if fields is not None:
+        content = json.dumps(_project_fields(response.json(), fields), sort_keys=True).encode('utf-8')
+    elif RAW_RESPONSE_WRITES:
+        content = response.content
+        if VALIDATE_RAW_RESPONSES:
+            try:
+                json.loads(content.decode('utf-8'))
+            except ValueError as error:
+                ERROR_LOGGER.write_to_log("This API_URL " + str(api_url) + " with page number " + str(page_number) + " has this error " + str(error) + " THE METHOD CALLER IS ASYNC_DOWNLOAD_API_PAGE_JSON")
+                raise
+    else:
+        content = json.dumps(response.json(), sort_keys=True).encode('utf-8')
+    await writeBehindWriter.get_write_behind_writer().async_put(*storage_key, content)
+    await _write_cache_validators(storage_key, response, fields)
+    return response
+
+# The validators of a file are kept next to it, under the same key with VALIDATORS_SUFFIX added to its kind
+def _get_validators_key(storage_key):
+    repo, state, pull_id, kind = storage_key
+    return repo, state, pull_id, kind + VALIDATORS_SUFFIX
+
+# A file kept with a different field projection than the one asked for now has to be downloaded again
+def _get_conditional_request_headers(storage_key, fields=None):
+    storage = storageBackend.get_storage()
+    if not CONDITIONAL_REQUESTS or not storage.exists(*storage_key):
+        return None
     try:
-        original_url = "https://api.github.com/user/"
-        output_path = os.path.join(targetManager.get_json_github_users_file_path_to(repo))
-        output_name = os.path.join(output_path, str(user_ID) + "_user.json")
-        request = download_api_page_json(original_url + str(user_ID), 1, output_name)
-        if request != 200:
-            PULL_REQUEST_QUEUE.put(user_ID)
-
-        print("Downloaded %s json..." % (str(user_ID).upper()))
-    except Exception:
-        PULL_REQUEST_QUEUE.put(user_ID)
+        validators = json.loads(storage.get(*_get_validators_key(storage_key)) or b"{}")
+    except ValueError:
+        return None
+    if validators.get("fields") != fields:
+        return None
+    conditional_headers = dict()
+    if validators.get("etag"):
+        conditional_headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        conditional_headers["If-Modified-Since"] = validators["last_modified"]
+    return conditional_headers or None
+
+async def _write_cache_validators(storage_key, response, fields=None):
+    validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+    if not (validators["etag"] or validators["last_modified"]):
+        await _remove_cache_validators(storage_key)
+        return
+    if fields is not None:
+        validators["fields"] = list(fields)
+    await writeBehindWriter.get_write_behind_writer().async_put(*_get_validators_key(storage_key),
+                                                                json.dumps(validators).encode('utf-8'))
+
+async def _remove_cache_validators(storage_key):
+    await writeBehindWriter.get_write_behind_writer().async_delete(*_get_validators_key(storage_key))
+
+
+# The parts of an aiohttp response the downloaders need, kept after the connection has been released
+class DownloadResponse:
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
 
 if __name__ == '__main__':
     REPO = "/freeCodeCamp/freeCodeCamp"
@@ -6,46 +6,137 @@
 #          the research group.
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+import github
+import storageBackend
 import pullRequestCollector
 from targetManager import TargetManager
 from logger import Logger
 import usersCollector
 import combineAllPullRequestCSVs as csvCombiner
 import commitCollector
+import checkpointJournal
+import workQueue
+from checkpointJournal import CHECKPOINT_JOURNAL
 
 HOME_PATH = os.getcwd()
 targetManager = TargetManager(HOME_PATH)
-targetManager.create_target_directory_structure()
 collected_repos_path = os.path.join(targetManager.get_collected_repos_path(), "collected_repos.txt")
 IMPORTANT_TEXT_PATH = targetManager.get_important_text_files_path()
 
 INFO_LOGGER = Logger(IMPORTANT_TEXT_PATH, "INFO_LOG", "INFO")
-INFO_LOGGER.set_up_log_file()
-
 ERROR_LOGGER = Logger(IMPORTANT_TEXT_PATH, "ERROR_LOG", "ERROR")
-ERROR_LOGGER.set_up_log_file()
 
-start = time.time()
-timeList = []
+# Every phase of a repo that finishes is written to the checkpoint journal. When main.py is restarted after a crash, the
+# finished phases (and the PRs already downloaded by an unfinished pulls phase) are skipped. A run that gets to the end
+# archives the journal, even if some repos failed, so the next run collects everything again
+collector_phases = [[checkpointJournal.PULLS, pullRequestCollector],
+                    [checkpointJournal.USERS, usersCollector],
+                    [checkpointJournal.COMMITS, commitCollector]]
+
+# How many repos are collected at the same time. They all share github.py's download engine (DOWNLOAD_CONCURRENCY
+# requests in flight) and the rate limit budget of every account, so small repos keep it busy while a large one finishes
+REPO_CONCURRENCY = 4
+
+# Start the largest repos (by their number of PRs) first, so the run does not end waiting on one large repo's tail
+SCHEDULE_LARGEST_REPOS_FIRST = True
+
+# Share the repos of collected_repos.txt with other collector nodes (e.g. other machines with their own
+# github_accounts) through a work queue in WORK_QUEUE_PATH. Every node runs main.py from the same directory on a volume
+# they can all reach, so they share one Target tree (and with it the queue, the checkpoint journal and the logs). Each
+# node claims repos until none are left, and the node that finishes the last one combines the CSVs and archives the
+# journal for all of them
+USE_WORK_QUEUE = False
+WORK_QUEUE_PATH = os.path.join(IMPORTANT_TEXT_PATH, "work_queue.sqlite3")
 
-# open the collected repos text file for parsing
-repo_lines = list(
-    map(str.strip, open(collected_repos_path, 'r').readlines()))  # strip all \n and place each line in a list
+# The number of PRs the repo had in an earlier run, or else the number GitHub reports for it now
+def get_estimated_repo_size(repo):
+    try:
+        if targetManager.repo_exists_in_target_structure(repo):
+            storage = storageBackend.get_storage()
+            known_pull_ids = sum(len(storage.list_pull_ids(repo, pull_state)) for pull_state in
+                                 [storageBackend.OPEN, storageBackend.MERGED, storageBackend.UNMERGED])
+            if known_pull_ids:
+                return known_pull_ids
+        return github.get_all_pull_nums(repo)
+    except Exception as error:
+        ERROR_LOGGER.write_to_log("This REPO " + str(repo) + " has this error " + str(error) +
+                                  " THE METHOD CALLER IS GET_ESTIMATED_REPO_SIZE")
+        return 0
 
-# Ensure that all repos have been properly collected
-for repo in repo_lines:
+# Run every unfinished phase of the repo, and return whether all of them have finished
+def collect_repo(repo):
     innerStart = time.time()
+    repo_finished = True
     try:
-        if not repo.startswith("/"):
-            continue
-        else:
-            INFO_LOGGER.write_to_log("Starting REPO (Pull requests) " + Logger.add_tabs(1) + repo)
-            targetManager.create_repo_subdirectories_for(repo)
-            pullRequestCollector.run_collector(repo)
-            usersCollector.run_collector(repo)
-            commitCollector.run_collector(repo)
-            INFO_LOGGER.write_to_log(Logger.add_tabs(1) +"The REPO finished (Pull requests)   " +
-                                     str(format(float((time.time() - innerStart)), "0.4f")) + " (sec)   " + str(format(float((time.time() - innerStart) / 60), "0.4f") + " (min)\n"))
+        INFO_LOGGER.write_to_log("Starting REPO (Pull requests) " + Logger.add_tabs(1) + repo)
+        targetManager.create_repo_subdirectories_for(repo)
+        for phase, collector in collector_phases:
+            if CHECKPOINT_JOURNAL.is_phase_finished(repo, phase):
+                INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Skipping the finished " + phase + " phase of " + repo)
+                continue
+            if collector.run_collector(repo):
+                CHECKPOINT_JOURNAL.record_phase_finished(repo, phase)
+            else:
+                repo_finished = False
+        INFO_LOGGER.write_to_log(Logger.add_tabs(1) +"The REPO " + repo + " finished (Pull requests)   " +
+                                 str(format(float((time.time() - innerStart)), "0.4f")) + " (sec)   " + str(format(float((time.time() - innerStart) / 60), "0.4f") + " (min)\n"))
     except Exception as error:
+        repo_finished = False
         ERROR_LOGGER.write_to_log("This REPO " + str(repo) + " has this error " + str(error) + " THE METHOD CALLER IS MAIN")
-csvCombiner.combine_all_pr_csvs()
\ No newline at end of file
+    return repo_finished
+
+# Collect the repos this node claims from the work queue, REPO_CONCURRENCY at a time. Return whether this node finished
+# the queue's last repo
+def collect_repos_from_work_queue(repos, repo_pool):
+    work_queue = workQueue.WorkQueue(WORK_QUEUE_PATH)
+    # The queue orders the repos, so only the repos no node has queued yet need their size estimated
+    queued_repos = work_queue.get_items()
+    new_repos = [repo for repo in repos if repo not in queued_repos]
+    repo_sizes = dict()
+    if SCHEDULE_LARGEST_REPOS_FIRST:
+        repo_sizes = dict(zip(new_repos, repo_pool.map(get_estimated_repo_size, new_repos)))
+    work_queue.add_items([[repo, repo_sizes.get(repo, 0)] for repo in new_repos] +
+                         [[repo, 0] for repo in repos if repo in queued_repos])
+    finished_last_repo = any(list(repo_pool.map(lambda worker: work_queue.work_until_finished(collect_repo),
+                                                range(REPO_CONCURRENCY))))
+    if finished_last_repo:  # no repo is left to claim, so the run is over, and the next one starts from the beginning
+        for repo, [status, node, claims] in work_queue.get_items().items():
+            if status == workQueue.FAILED:
+                ERROR_LOGGER.write_to_log("This REPO " + str(repo) + " was given up on after " + str(claims) +
+                                          " claims THE METHOD CALLER IS MAIN")
+        work_queue.clear()
+    return finished_last_repo
+
+# The worker processes of the stage_01 builder import this script as well, and must not start a run of their own
+if __name__ == "__main__":
+    targetManager.create_target_directory_structure()
+    if not USE_WORK_QUEUE:  # the other nodes of a work queue may already be writing today's logs
+        INFO_LOGGER.set_up_log_file()
+        ERROR_LOGGER.set_up_log_file()
+
+    start = time.time()
+    timeList = []
+
+    # open the collected repos text file for parsing
+    repo_lines = list(
+        map(str.strip, open(collected_repos_path, 'r').readlines()))  # strip all \n and place each line in a list
+    repos = [repo for repo in repo_lines if repo.startswith("/")]
+
+    # Ensure that all repos have been properly collected
+    finished_last_repo = True
+    with ThreadPoolExecutor(REPO_CONCURRENCY) as repo_pool:
+        if USE_WORK_QUEUE:
+            finished_last_repo = collect_repos_from_work_queue(repos, repo_pool)
+        else:
+            if SCHEDULE_LARGEST_REPOS_FIRST:
+                repo_sizes = dict(zip(repos, repo_pool.map(get_estimated_repo_size, repos)))
+                repos.sort(key=lambda repo: repo_sizes[repo], reverse=True)
+            list(repo_pool.map(collect_repo, repos))
+
+    # With a work queue, only the node that finished the last repo goes on, once every node's repos are in
+    if finished_last_repo:
+        csvCombiner.combine_all_pr_csvs()
+
+        # The run got to the end, so its journal is set aside. Only a run that crashed leaves it behind to resume from
+        CHECKPOINT_JOURNAL.archive()
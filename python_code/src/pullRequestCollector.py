@@ -9,6 +9,8 @@ import time
 import github
 import researchToolkit
 from logger import Logger
+from checkpointJournal import CHECKPOINT_JOURNAL
+import checkpointJournal
 from targetManager import TargetManager
 
 HOME_PATH = os.getcwd()
@@ -19,26 +21,80 @@ MERGED = "closed_merged"
 UNMERGED = "closed_unmerged"
 OPEN = "open"
 
+# Download PR details with batched GraphQL queries (100 PRs per request) instead of one REST request per PR
+USE_GRAPHQL_DOWNLOADER = False
+
+# Discover PR ids with one pass over the pulls listing instead of three (1000 result capped) search queries
+USE_PULLS_LISTING_DISCOVERY = False
+
+# Only collect the PRs created or updated since this repo's last complete collection (its watermark), instead of every
+# PR. A repo without a watermark is always collected in full
+INCREMENTAL_COLLECTION = False
+
+# Download the users and commits of the repo while its PRs are still downloading (each one as soon as the PR that
+# names it is in), instead of leaving them to the users and commits phases that run afterwards
+PIPELINE_USERS_AND_COMMITS = False
+
 '''Program entry point'''
 def run_collector(repo):
     start_time = time.time()
+    collection_started_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(start_time))
+    updated_since = researchToolkit.get_collection_watermark(repo) if INCREMENTAL_COLLECTION else None
     # Set up dictionaries that will store the urls of the pull requests collected
     INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Starting to gather pull ids" + get_time_string(start_time))
-    closed_merged_pull_ids = github.git_pull_ids_merged(repo)
-    closed_unmerged_pull_ids = github.git_pull_ids_unmerged(repo)
-    open_pull_ids = github.git_pull_ids_open(repo)
+    if USE_PULLS_LISTING_DISCOVERY:
+        closed_merged_pull_ids, closed_unmerged_pull_ids, open_pull_ids = github.git_pull_ids_all_states(
+            repo, updated_since)
+    else:
+        closed_merged_pull_ids = github.git_pull_ids_merged(repo, updated_since)
+        closed_unmerged_pull_ids = github.git_pull_ids_unmerged(repo, updated_since)
+        open_pull_ids = github.git_pull_ids_open(repo, updated_since)
     INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Finished gathering pull ids" + get_time_string(start_time))
 
     # Generate the id folders from the requested pull_ids
     INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Starting to make id folders" + get_time_string(start_time))
-    researchToolkit.create_pull_request_id_folders(repo, closed_merged_pull_ids, MERGED)
-    researchToolkit.create_pull_request_id_folders(repo, closed_unmerged_pull_ids, UNMERGED)
-    researchToolkit.create_pull_request_id_folders(repo, open_pull_ids, OPEN)
+    if updated_since is None:
+        researchToolkit.create_pull_request_id_folders(repo, closed_merged_pull_ids, MERGED)
+        researchToolkit.create_pull_request_id_folders(repo, closed_unmerged_pull_ids, UNMERGED)
+        researchToolkit.create_pull_request_id_folders(repo, open_pull_ids, OPEN)
+        pull_ids = github.get_pull_ids_list_from_repo(repo)
+    else:
+        researchToolkit.update_pull_request_id_folders(repo, closed_merged_pull_ids, closed_unmerged_pull_ids,
+                                                       open_pull_ids)
+        pull_ids = github.get_pull_ids_list_for(repo, closed_merged_pull_ids, closed_unmerged_pull_ids,
+                                                open_pull_ids)
     INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Finished making id folders" + get_time_string(start_time))
 
+    # PRs that an earlier, interrupted run already downloaded are in the checkpoint journal and are not downloaded again
+    finished_pull_items = CHECKPOINT_JOURNAL.get_finished_items(repo, checkpointJournal.PULLS)
+    pull_ids = [pull_info for pull_info in pull_ids
+                if checkpointJournal.get_pull_item(pull_info) not in finished_pull_items]
+
+    downloaded_pull_ids = set()
+
+    def on_pull_downloaded(pull_info):
+        downloaded_pull_ids.add(pull_info[1])
+        CHECKPOINT_JOURNAL.record_item_finished(repo, checkpointJournal.PULLS,
+                                                checkpointJournal.get_pull_item(pull_info))
+
     #set up and call the threads
     INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Starting to download JSON" + get_time_string(start_time))
-    github.download_pull_requests(repo)
+    if USE_GRAPHQL_DOWNLOADER:
+        github.download_pull_requests_graphql(repo, pull_ids, on_pull_downloaded)
+    elif PIPELINE_USERS_AND_COMMITS:
+        def on_user_downloaded(user_ID):
+            CHECKPOINT_JOURNAL.record_item_finished(repo, checkpointJournal.USERS, user_ID)
+
+        def on_commits_downloaded(pull_info):
+            CHECKPOINT_JOURNAL.record_item_finished(repo, checkpointJournal.COMMITS,
+                                                    checkpointJournal.get_pull_item(pull_info))
+
+        github.download_pull_requests_pipelined(repo, pull_ids, on_pull_downloaded, on_user_downloaded,
+                                                on_commits_downloaded,
+                                                CHECKPOINT_JOURNAL.get_finished_items(repo, checkpointJournal.USERS),
+                                                CHECKPOINT_JOURNAL.get_finished_items(repo, checkpointJournal.COMMITS))
+    else:
+        github.download_pull_requests(repo, pull_ids, on_pull_downloaded)
     INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Finished downloading JSON" + get_time_string(start_time))
 
     # Parse the downloaded main_pull.json files and create a pull_request dictionary, then refine it.
@@ -52,11 +108,21 @@ def run_collector(repo):
     # Write all parsed information into three separate csv files, so no data is lost
     INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Starting to write the CSVs files" + get_time_string(start_time))
     researchToolkit.write_all_stage_01_pr_dictionary_csv_files(repo, pr_dict_stage_01)
+    researchToolkit.publish_author_IDs(repo, pr_dict_stage_01)
     researchToolkit.write_all_stage_02_pr_dictionary_csv_files(repo, pr_dict_stage_02)
     researchToolkit.write_all_stage_03_pr_dictionary_csv_files(repo, pr_dict_stage_03)
     researchToolkit.write_all_drive_by_pr_dictionary_csv_files(repo, pr_dict_drive_by_author)
     INFO_LOGGER.write_to_log(Logger.add_tabs(1) + "Finished writing the CSVs files" + get_time_string(start_time))
-    return
+
+    # A PR that still failed after MAX_DOWNLOAD_ATTEMPTS keeps the watermark (and the phase) where it is, so the next run
+    # asks for it again
+    failed_pull_ids = [pull_info[1] for pull_info in pull_ids if pull_info[1] not in downloaded_pull_ids]
+    if failed_pull_ids:
+        INFO_LOGGER.write_to_log(Logger.add_tabs(1) + str(len(failed_pull_ids)) + " PRs of " + repo + " failed to "
+                                 "download, the next run will try them again" + get_time_string(start_time))
+        return False
+    researchToolkit.set_collection_watermark(repo, collection_started_at)
+    return True
 
 def print_dict(pr_dict, pull_state):
     print("========================================")
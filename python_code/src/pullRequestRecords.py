@@ -0,0 +1,115 @@
+# pullRequestRecords.py
+# Date: 10/18/2026
+# Purpose: Hold the stage_01 rows of a pull state column by column, instead of as one Python list per PR. Numbers live in
+#          typed arrays, the dates as datetime64 seconds, and the login, repo and state strings are dictionary encoded, so
+#          a repo with hundreds of thousands of PRs fits in a fraction of the memory.
+
+from array import array
+import numpy as np
+
+LOGIN = "login"
+USER_ID = "user_id"
+REPO = "repo"
+NUMBER = "number"
+STATE = "state"
+CREATED_AT = "created_at"
+CLOSED_AT = "closed_at"
+REVIEW_COMMENTS = "review_comments"
+COMMITS = "commits"
+ADDITIONS = "additions"
+DELETIONS = "deletions"
+CHANGED_FILES = "changed_files"
+
+# The columns in the order of a stage_01 row (and of the stage_01 CSV files)
+COLUMNS = [LOGIN, USER_ID, REPO, NUMBER, STATE, CREATED_AT, CLOSED_AT, REVIEW_COMMENTS, COMMITS, ADDITIONS, DELETIONS,
+           CHANGED_FILES]
+STRING_COLUMNS = [LOGIN, REPO, STATE]
+DATE_COLUMNS = [CREATED_AT, CLOSED_AT]
+
+# A missing (None) number is kept as the smallest int64, which is also how NumPy stores a missing date (NaT)
+MISSING = np.iinfo(np.int64).min
+
+# Rows are rebuilt this many at a time when the records are iterated
+ITERATION_BLOCK_SIZE = 10000
+
+
+class PullRequestRecords:
+    def __init__(self, rows=()):
+        self.CODES = {column: array('i') for column in STRING_COLUMNS}
+        self.VALUES = {column: list() for column in STRING_COLUMNS}
+        self.VALUE_CODES = {column: dict() for column in STRING_COLUMNS}
+        self.NUMBERS = {column: array('q') for column in COLUMNS if column not in STRING_COLUMNS}
+        PullRequestRecords.extend(self, rows)
+
+    def __len__(self):
+        return len(self.NUMBERS[NUMBER])
+
+    def __repr__(self):
+        return "PullRequestRecords(%d PRs)" % len(self)
+
+    def __iter__(self):
+        for start in range(0, len(self), ITERATION_BLOCK_SIZE):
+            for row in PullRequestRecords.get_rows(self, start, start + ITERATION_BLOCK_SIZE):
+                yield row
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PullRequestRecords index out of range")
+        return PullRequestRecords.get_rows(self, index, index + 1)[0]
+
+    # Take a stage_01 row: [login, user id, repo, number, state, created at, closed at, review comments, commits,
+    # additions, deletions, changed files]. The dates are GitHub's ISO 8601 UTC times (e.g. 2017-07-01T12:00:00Z) or None
+    def append(self, row):
+        for column, value in zip(COLUMNS, row):
+            if column in STRING_COLUMNS:
+                value_codes = self.VALUE_CODES[column]
+                if value not in value_codes:
+                    value_codes[value] = len(self.VALUES[column])
+                    self.VALUES[column].append(value)
+                self.CODES[column].append(value_codes[value])
+            elif column in DATE_COLUMNS:
+                self.NUMBERS[column].append(MISSING if value is None else
+                                            int(np.datetime64(value.rstrip("Z"), 's').astype(np.int64)))
+            else:
+                self.NUMBERS[column].append(MISSING if value is None else int(value))
+
+    def extend(self, rows):
+        for row in rows:
+            PullRequestRecords.append(self, row)
+
+    # The integer code of every row of a string column, and the strings the codes stand for
+    def get_codes(self, column):
+        return np.frombuffer(self.CODES[column], dtype=np.int32) if len(self) else np.zeros(0, dtype=np.int32)
+
+    def get_values(self, column):
+        return list(self.VALUES[column])
+
+    # A whole column as a NumPy array: int64 for numbers, datetime64[s] for dates, and str for strings
+    def get_column(self, column):
+        if column in STRING_COLUMNS:
+            return np.array(self.VALUES[column] or [""])[PullRequestRecords.get_codes(self, column)]
+        numbers = (np.frombuffer(self.NUMBERS[column], dtype=np.int64) if len(self)
+                   else np.zeros(0, dtype=np.int64))
+        if column in DATE_COLUMNS:
+            return numbers.view('datetime64[s]')
+        return numbers
+
+    # Rebuild the stage_01 rows start to end (exclusive) as lists of plain Python values, dates as GitHub wrote them
+    def get_rows(self, start, end):
+        end = min(end, len(self))
+        if start >= end:
+            return []
+        columns = list()
+        for column in COLUMNS:
+            if column in STRING_COLUMNS:
+                values = self.VALUES[column]
+                columns.append([values[code] for code in self.CODES[column][start:end]])
+            elif column in DATE_COLUMNS:
+                dates = PullRequestRecords.get_column(self, column)[start:end]
+                columns.append([None if date == "NaT" else date + "Z"
+                                for date in np.datetime_as_string(dates, unit='s').tolist()])
+            else:
+                columns.append([None if number == MISSING else number for number in self.NUMBERS[column][start:end]])
+        return [list(row) for row in zip(*columns)]
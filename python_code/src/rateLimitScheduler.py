@@ -0,0 +1,123 @@
+# rateLimitScheduler.py
+# Date: 10/18/2026
+# Purpose: Keep track of how much of GitHub's rate limit every account has left, so each request can be handed to the
+#          account with the most remaining budget, and so we only ever wait when every account has been drained.
+
+import threading
+import asyncio
+import time
+
+CORE = "core"
+SEARCH = "search"
+GRAPHQL = "graphql"
+
+# Hourly (core, graphql) or per minute (search) allowance of a single authenticated account
+DEFAULT_LIMITS = {CORE: 5000, SEARCH: 30, GRAPHQL: 5000}
+
+# Seconds an account sits out after a secondary (abuse) limit response that carries no Retry-After. The wait doubles
+# with every secondary limit response in a row, up to MAX_SECONDARY_LIMIT_BACKOFF
+SECONDARY_LIMIT_BACKOFF = 60
+MAX_SECONDARY_LIMIT_BACKOFF = 960
+
+# While no response has told us when a drained resource resets, one probe request is let through this often to learn it
+UNKNOWN_RESET_PROBE_SECONDS = 5
+
+
+class RateLimitScheduler:
+    def __init__(self, accounts, reserve=1):
+        self.ACCOUNTS = list(accounts)
+        self.RESERVE = reserve
+        self.LOCK = threading.Lock()
+        self.BUDGETS = dict()
+        for resource in DEFAULT_LIMITS:
+            self.BUDGETS[resource] = {account: [DEFAULT_LIMITS[resource], 0] for account in self.ACCOUNTS}
+        self.NEXT_PROBE_TIMES = {resource: 0 for resource in DEFAULT_LIMITS}
+        self.SECONDARY_LIMIT_STRIKES = {account: 0 for account in self.ACCOUNTS}
+
+    @staticmethod
+    def get_resource_for(api_url):
+        if "/search/" in api_url:
+            return SEARCH
+        if api_url.rstrip("/").endswith("/graphql"):
+            return GRAPHQL
+        return CORE
+
+    # Hand out the account with the most remaining budget for this resource as (account, 0). When every account is
+    # drained, return (None, seconds until the earliest reset) instead. When no reset time is known yet (the budgets were
+    # handed out before any response came back), an account is handed out every UNKNOWN_RESET_PROBE_SECONDS as a probe
+    def reserve_account(self, resource):
+        with self.LOCK:
+            current_time = time.time()
+            budgets = self.BUDGETS[resource]
+            for account in self.ACCOUNTS:
+                if budgets[account][1] and budgets[account][1] <= current_time:
+                    budgets[account] = [DEFAULT_LIMITS[resource], 0]  # the window has reset since we last heard
+
+            best_account = max(self.ACCOUNTS, key=lambda account: budgets[account][0])
+            if budgets[best_account][0] > self.RESERVE:
+                budgets[best_account][0] -= 1
+                return best_account, 0
+
+            reset_times = [budgets[account][1] for account in self.ACCOUNTS if budgets[account][1]]
+            if reset_times:
+                return None, max(min(reset_times) - current_time, 0) + 1
+            if self.NEXT_PROBE_TIMES[resource] <= current_time:
+                self.NEXT_PROBE_TIMES[resource] = current_time + UNKNOWN_RESET_PROBE_SECONDS
+                return best_account, 0
+            return None, self.NEXT_PROBE_TIMES[resource] - current_time
+
+    # Record the rate limit headers of a response. Returns False when the response was refused by a rate limit and the
+    # request must be sent again. A 403 without Retry-After whose remaining budget is not spent is a secondary rate limit,
+    # unless the response_content (when given) shows it was refused for another reason
+    def record_response(self, account, resource, status_code, response_headers, response_content=None):
+        resource = response_headers.get("X-RateLimit-Resource", resource)
+        if resource not in self.BUDGETS:
+            return True
+        remaining = response_headers.get("X-RateLimit-Remaining")
+        reset_time = response_headers.get("X-RateLimit-Reset")
+        retry_after = response_headers.get("Retry-After")
+
+        if remaining is not None:
+            remaining = int(remaining)
+
+        with self.LOCK:
+            budget = self.BUDGETS[resource][account]
+            if remaining is not None and reset_time is not None:
+                reset_time = int(reset_time)
+                if reset_time == budget[1]:
+                    remaining = min(remaining, budget[0])  # requests we handed out after this one are still in flight
+                self.BUDGETS[resource][account] = [remaining, reset_time]
+
+            if status_code not in (403, 429):
+                self.SECONDARY_LIMIT_STRIKES[account] = 0
+                return True
+            if retry_after is not None:
+                self.BUDGETS[resource][account] = [0, time.time() + int(retry_after)]
+            elif remaining is None or remaining > 0:
+                if status_code == 403 and response_content is not None and \
+                        b"rate limit" not in response_content.lower():
+                    return True  # an ordinary 403 (e.g. a blocked resource), not a rate limit
+                backoff = min(SECONDARY_LIMIT_BACKOFF * 2 ** self.SECONDARY_LIMIT_STRIKES[account],
+                              MAX_SECONDARY_LIMIT_BACKOFF)
+                self.SECONDARY_LIMIT_STRIKES[account] += 1
+                self.BUDGETS[resource][account] = [0, time.time() + backoff]
+        return False
+
+    def wait_for_account(self, resource):
+        while True:
+            account, wait_seconds = RateLimitScheduler.reserve_account(self, resource)
+            if account is not None:
+                return account
+            if not threading.current_thread().daemon:
+                print("==========================================================================\n\n")
+                print(" X Rate-Limit Reached. MAIN THREAD is waiting %d seconds for the %s Rate-Limit to reset."
+                      % (wait_seconds, resource.upper()))
+                print("\n\n==========================================================================")
+            time.sleep(wait_seconds)
+
+    async def async_wait_for_account(self, resource):
+        while True:
+            account, wait_seconds = RateLimitScheduler.reserve_account(self, resource)
+            if account is not None:
+                return account
+            await asyncio.sleep(wait_seconds)
@@ -0,0 +1,79 @@
+# repositoryStats.py
+# Date: 10/18/2026
+# Purpose: Count the commits and contributors of repositories through GitHub's API instead of scraping github.com. Each
+#          count costs one per_page=1 request (the Link header's last page number is the count), the repos are counted
+#          concurrently, and the counts are cached in repository_stats.json for STATS_CACHE_TTL_SECONDS.
+
+import threading
+import json
+import time
+import os
+import github
+from targetManager import TargetManager
+
+COMMITS = "commits"
+CONTRIBUTORS = "contributors"
+FETCHED_AT = "fetched_at"
+
+# How long a cached count is used before it is requested again
+STATS_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+targetManager = TargetManager(os.getcwd())
+collected_repos_path = os.path.join(targetManager.get_collected_repos_path(), "collected_repos.txt")
+
+_stats_cache_lock = threading.Lock()
+
+
+def get_stats_cache_path():
+    return os.path.join(targetManager.get_important_text_files_path(), "repository_stats.json")
+
+
+def _read_stats_cache():
+    try:
+        with open(get_stats_cache_path(), 'r', encoding='utf-8') as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return dict()
+
+
+def _write_stats_cache(stats_cache):
+    with open(get_stats_cache_path() + ".tmp", 'w', encoding='utf-8') as cache_file:
+        json.dump(stats_cache, cache_file, indent=1, sort_keys=True)
+    os.replace(get_stats_cache_path() + ".tmp", get_stats_cache_path())
+
+
+# Return {repo: {"commits": count, "contributors": count}} for the given repos (e.g. "/owner/name"). Only the repos
+# without a fresh cached count are requested, all of them at once. A count GitHub would not give is None
+def get_repository_stats(repos):
+    with _stats_cache_lock:
+        stats_cache = _read_stats_cache()
+        now = time.time()
+        stale_repos = [repo for repo in repos if repo not in stats_cache or
+                       now - stats_cache[repo].get(FETCHED_AT, 0) >= STATS_CACHE_TTL_SECONDS]
+        if stale_repos:
+            api_urls = list()
+            for repo in stale_repos:
+                api_urls.append("https://api.github.com/repos" + repo + "/commits")
+                api_urls.append("https://api.github.com/repos" + repo + "/contributors")
+            counts = github.get_api_listing_counts(api_urls)
+            for index, repo in enumerate(stale_repos):
+                stats_cache[repo] = {COMMITS: counts[2 * index], CONTRIBUTORS: counts[2 * index + 1]}
+                if None not in stats_cache[repo].values():  # a failed count is asked for again next time
+                    stats_cache[repo][FETCHED_AT] = now
+            _write_stats_cache(stats_cache)
+    return {repo: {COMMITS: stats_cache[repo][COMMITS], CONTRIBUTORS: stats_cache[repo][CONTRIBUTORS]}
+            for repo in repos}
+
+
+# The stats of every repo in collected_repos.txt
+def get_all_repository_stats():
+    repo_lines = list(map(str.strip, open(collected_repos_path, 'r').readlines()))
+    return get_repository_stats([repo for repo in repo_lines if repo.startswith("/")])
+
+
+def get_number_of_total_commits(repo):
+    return get_repository_stats([repo])[repo][COMMITS]
+
+
+def get_number_of_total_contributors(repo):
+    return get_repository_stats([repo])[repo][CONTRIBUTORS]
@@ -6,16 +6,20 @@
 #
 # Purpose: Create a toolkit that will allow for assistance in undergraduate research.
 
-from operator import itemgetter
-from bs4 import BeautifulSoup
-import requests
+import numpy as np
 import shutil
 import json
-import time
 import csv
 import os
+import multiprocessing
+import threading
 from targetManager import TargetManager
 from logger import Logger
+import storageBackend
+import userCache
+import repositoryStats
+from pullRequestRecords import PullRequestRecords
+import pullRequestRecords
 
 targetManager = TargetManager(os.getcwd())
 IMPORTANT_TEXT_PATH = targetManager.get_important_text_files_path()
@@ -29,6 +33,30 @@ MERGED = "closed_merged"
 UNMERGED = "closed_unmerged"
 OPEN = "open"
 
+# The state names storageBackend files the PR ids of each pull type under
+STORAGE_STATES = {MERGED: storageBackend.MERGED,
+                  UNMERGED: storageBackend.UNMERGED,
+                  OPEN: storageBackend.OPEN
+                  }
+
+# The author ids publish_author_IDs() handed over to usersCollector, by repo
+_author_IDs = dict()
+_author_IDs_lock = threading.Lock()
+
+# The stage_01 dictionary is built by this many worker processes (1 builds it in this process), each parsing chunks of
+# STAGE_01_CHUNK_SIZE main_pull.json files
+STAGE_01_PROCESSES = 1
+STAGE_01_CHUNK_SIZE = 500
+
+# The storage a stage_01 worker process opened, see _start_stage_01_worker
+_stage_01_worker_storage = None
+
+# What get_pull_request_dictionary_stage_01 adds to the "state" field of a PR of each pull type
+STAGE_01_STATE_SUFFIXES = {OPEN: "",
+                           MERGED: "-merged",
+                           UNMERGED: "-unmerged"
+                           }
+
 FIRST = 0
 SECOND = 1
 THIRD = 2
@@ -38,19 +66,9 @@ ONE = 1
 ''' This section of code is responsible for finding all relevant info on COMMIT NUMBERS of a given repo.'''
 
 
-# determine how many total commits comprise a given repository
+# determine how many total commits comprise a given repository (see repositoryStats)
 def calculate_number_of_total_commits(repo_text):
-    url = "https://github.com%s" % repo_text
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    page = requests.get(url, headers=headers)  # get the webpage information
-    soup = BeautifulSoup(page.content, 'html.parser')  # We are now going to parse the html of this page
-    print("PAGE STATUS CODE: %s" % page.status_code)
-    time.sleep(2)  # Force the program to slow execution as to avoid being "mistaken" for a bot
-
-    # Find the number of commits from the website, and remove all whitespace, tabs, and new lines to create an int
-    for item in soup.find('span', class_="num text-emphasized"):
-        num_commits = int("".join(str(item.split('\n')[1]).strip(" ").split(',')))
-    return num_commits
+    return repositoryStats.get_number_of_total_commits(repo_text)
 
 
 # determine how many pages of commits need to be parsed through to get all commits
@@ -63,19 +81,9 @@ def calculate_number_of_commit_pages(commit_number):
 ''' This section of code is responsible for finding the total number of CONTRIBUTORS to a project.'''
 
 
-# determine the total number of contributors that comprise a given repository
+# determine the total number of contributors that comprise a given repository (see repositoryStats)
 def calculate_number_of_total_contributors(repo_text):
-    url = "https://github.com%s" % repo_text
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    page = requests.get(url, headers=headers)  # get the webpage information
-    soup = BeautifulSoup(page.content, 'html.parser')  # We are now going to parse the html of this page
-    print("PAGE STATUS CODE: %s" % page.status_code)
-    time.sleep(2)  # Force the program to slow execution as to avoid being "mistaken" for a bot
-
-    # Find the number of commits from the website, and remove all whitespace, tabs, and new lines to create an int
-    for item in soup.find_all('span', class_="num text-emphasized")[3]:
-        num_contrib = int("".join(str(item.split('\n')[1]).strip(" ").split(',')))
-    return num_contrib
+    return repositoryStats.get_number_of_total_contributors(repo_text)
 
 
 # -------------------------------------------------------------------------------------------------------------------- #
@@ -87,30 +95,63 @@ def calculate_number_of_total_contributors(repo_text):
 def gather_author_dictionary(author_dict, file_name):
     # Open the json file for reading so we can access its information
     with open(file_name, 'r') as file:
-        data = json.load(file)
-        keys = author_dict.keys()  # Obtain every key in this dictionary for comparison
-
-        for item in data:  # Look for repos we have already found, only add new repos
-            count = 1
-            author = str(item["commit"]["author"]["name"]).lower()
-            email = str(item["commit"]["author"]["email"]).lower()
-
-            # in the event that an author does not have an associated id, set it equal to None
-            try:
-                author_id = item["author"]["id"]
-            except Exception as e:
-                author_id = None
-
-            my_list = [author, author_id, count]  # Save relevant information in association with this email address
-            if email not in keys:
-                author_dict.update({email: my_list})  # Add any new repos
-            else:
-                author_dict[email][2] = (author_dict[email][2] + 1)  # otherwise, keep track of each commit
-                continue
+        return gather_author_dictionary_from_page(author_dict, json.load(file))
+
+
+# The same as gather_author_dictionary, for a page that has already been parsed
+def gather_author_dictionary_from_page(author_dict, data):
+    keys = author_dict.keys()  # Obtain every key in this dictionary for comparison
+
+    for item in data:  # Look for repos we have already found, only add new repos
+        count = 1
+        author = str(item["commit"]["author"]["name"]).lower()
+        email = str(item["commit"]["author"]["email"]).lower()
+
+        # in the event that an author does not have an associated id, set it equal to None
+        try:
+            author_id = item["author"]["id"]
+        except Exception as e:
+            author_id = None
+
+        my_list = [author, author_id, count]  # Save relevant information in association with this email address
+        if email not in keys:
+            author_dict.update({email: my_list})  # Add any new repos
+        else:
+            author_dict[email][2] = (author_dict[email][2] + 1)  # otherwise, keep track of each commit
+            continue
 
     return author_dict  # Return the dictionary with pertinent information
 
 
+# Pass every stored commits page of the repo through gather_author_dictionary, one page at a time, so only the authors
+# are held in memory and not the commits
+def get_commit_author_dictionary(repo):
+    print("\nGetting the commit author dictionary")
+    author_dict = dict()
+    storage = storageBackend.get_storage()
+    for pull_state in storageBackend.PULL_STATES:
+        page_number = 1
+        while True:  # a PR only has a page when it has every page before it, so stop at the first page nobody has
+            page_found = False
+            for pull_id, content in storage.iterate_contents(repo, pull_state,
+                                                             storageBackend.get_commit_page_kind(page_number)):
+                page_found = True
+                try:
+                    data = json.loads(content.decode('utf-8'))
+                    if not isinstance(data, list):  # GitHub's answer was an error, not commits
+                        raise ValueError(str(data.get("message")))
+                    gather_author_dictionary_from_page(author_dict, data)
+                except Exception as error:
+                    ERROR_LOGGER.write_to_log("This PR " + str(pull_id) + " for " + str(repo) + " has this error " +
+                                              str(error) + " in commits page " + str(page_number) +
+                                              " THE METHOD CALLER IS GET_COMMIT_AUTHOR_DICTIONARY")
+            if not page_found:
+                break
+            page_number += 1
+    print("Commit author dictionary obtained")
+    return author_dict
+
+
 # Refine a commit dictionary passed into this method, and return a dictionary that only contains drive by commits
 def refine_commit_dictionary(old_commit_dict):
     new_dict = dict()
@@ -138,6 +179,14 @@ def create_commit_dictionary_csv_file(file_path, dictionary):
     return  # Nothing to return here
 
 
+# Write every commit author of the repo, and the drive by ones (a single commit), to its commit-level CSV folder
+def write_commit_author_csv_files(repo, author_dict):
+    commit_level_path = targetManager.get_commit_level_csv_subdirectory_path_for(repo)
+    create_commit_dictionary_csv_file(os.path.join(commit_level_path, "commit_authors.csv"), author_dict)
+    create_commit_dictionary_csv_file(os.path.join(commit_level_path, "drive_by_commit_authors.csv"),
+                                      refine_commit_dictionary(author_dict))
+
+
 def create_pull_id_dictionary_csv_file(file_path, pull_ids):
     with open(file_path, "w", newline="", encoding="utf-8") as csvfile:
         writer = csv.writer(csvfile, quoting=csv.QUOTE_NONE, delimiter='|', quotechar='', escapechar='\\')
@@ -156,28 +205,58 @@ def create_pull_id_dictionary_csv_file(file_path, pull_ids):
 def create_pull_request_id_folders(repo, pull_ids, pull_type):
     print("\nCreating %s Pull ID folders. This may take a few moments..." % str(
         pull_type).upper())  # Let the user know what is happening
-    targetManager.delete_all_open_pull_id_subdirectories_for(repo)
+    storage = storageBackend.get_storage()
+    pull_state = STORAGE_STATES[pull_type]
+    if pull_type == OPEN:  # Keep the files (and cache validators) of PRs that are still open
+        still_open_pull_ids = set(str(pull_id) for pull_id in pull_ids)
+        storage.remove_pull_ids(repo, pull_state, [pull_id for pull_id in storage.list_pull_ids(repo, pull_state)
+                                                   if pull_id not in still_open_pull_ids])
 
     # Write every id we have collected as a folder
-    for pull_id in range(len(pull_ids) - 1, -1, -1):
-        if pull_type == "closed_merged":
-            targetManager.create_repo_merged_pull_id_directory_for(repo, str(pull_ids[pull_id]))
+    storage.add_pull_ids(repo, pull_state, [str(pull_id) for pull_id in reversed(pull_ids)])
+    print("%s Pull ID folders successfully created." % str(pull_type).upper())  # Let the user know what is happening
 
-        elif pull_type == "closed_unmerged":
-            targetManager.create_repo_unmerged_pull_id_directory_for(repo, str(pull_ids[pull_id]))
 
-        else:
-            targetManager.create_repo_open_pull_id_directory_for(repo, str(pull_ids[pull_id]))
-    print("%s Pull ID folders successfully created." % str(pull_type).upper())  # Let the user know what is happening
+# Move the folders of PRs that changed since the last collection into their current state, and leave every other PR
+# folder (and its downloaded files) alone
+def update_pull_request_id_folders(repo, merged_pull_ids, unmerged_pull_ids, open_pull_ids):
+    print("\nUpdating the Pull ID folders of %d changed PRs..." % (
+        len(merged_pull_ids) + len(unmerged_pull_ids) + len(open_pull_ids)))
+    storage = storageBackend.get_storage()
+    pull_ids_by_state = {storageBackend.MERGED: [str(pull_id) for pull_id in merged_pull_ids],
+                         storageBackend.UNMERGED: [str(pull_id) for pull_id in unmerged_pull_ids],
+                         storageBackend.OPEN: [str(pull_id) for pull_id in open_pull_ids]}
+    for pull_state, pull_ids in pull_ids_by_state.items():
+        for other_pull_state in pull_ids_by_state:
+            if other_pull_state != pull_state:  # This PR changed state, forget what we had for its old state
+                storage.remove_pull_ids(repo, other_pull_state, pull_ids)
+        storage.add_pull_ids(repo, pull_state, pull_ids)
+    print("Pull ID folders successfully updated.")
+
+
+# The time (ISO 8601, UTC) at which the last complete pull request collection of this repo started, or None
+def get_collection_watermark(repo):
+    watermark_path = targetManager.get_collection_watermark_file_path_for(repo)
+    if not os.path.isfile(watermark_path):
+        return None
+    with open(watermark_path, 'r') as watermark_file:
+        return watermark_file.read().strip() or None
+
+
+def set_collection_watermark(repo, watermark):
+    with open(targetManager.get_collection_watermark_file_path_for(repo), 'w') as watermark_file:
+        watermark_file.write(watermark)
 
 
 # Pass in the repo and return a dictionary whose keys are the pull request type (merged, unmerged, & open) and whose
-# values are dictionaries that contain
+# values are the PullRequestRecords of that type
 def get_pull_request_dictionary_stage_01(repo):
+    if STAGE_01_PROCESSES > 1:
+        return get_pull_request_dictionary_stage_01_parallel(repo, STAGE_01_PROCESSES)
     print("\n\nGetting stage_01 pull request dictionary")
-    open_list = []
-    merged_list = []
-    unmerged_list = []
+    open_list = PullRequestRecords()
+    merged_list = PullRequestRecords()
+    unmerged_list = PullRequestRecords()
     pull_request_dictionary = {OPEN: open_list,
                                MERGED: merged_list,
                                UNMERGED: unmerged_list
@@ -192,46 +271,91 @@ def get_pull_request_dictionary_stage_01(repo):
     return pull_request_dictionary
 
 
+# The parsed main_pull.json of every PR of this pull type. A PR whose download failed is logged and left out
+def _get_main_pull_jsons_for(repo, pull_type):
+    storage = storageBackend.get_storage()
+    pull_state = STORAGE_STATES[pull_type]
+    missing_pull_ids = set(storage.list_pull_ids(repo, pull_state))
+    for pull_id, content in storage.iterate_contents(repo, pull_state, storageBackend.MAIN_PULL_JSON):
+        missing_pull_ids.discard(pull_id)
+        yield json.loads(content.decode('utf-8'))
+    for pull_id in missing_pull_ids:
+        ERROR_LOGGER.write_to_log("This PR " + str(pull_id) + " for " + str(repo) + " has no main_pull.json "
+                                  "THE METHOD CALLER IS _GET_MAIN_PULL_JSONS_FOR")
+
+
+def _get_stage_01_row(data, stripped_repo, pull_type):
+    return [data["user"]["login"], data["user"]["id"], stripped_repo, data["number"],
+            (data["state"] + STAGE_01_STATE_SUFFIXES[pull_type]), data["created_at"], data["closed_at"],
+            data["review_comments"], data["commits"], data["additions"], data["deletions"], data["changed_files"]]
+
+
+# The same dictionary as get_pull_request_dictionary_stage_01, with the main_pull.json files parsed by a pool of
+# process_count worker processes (all cores when None). The chunks come back in order, so the rows are in the order the
+# PRs are listed in. The workers are spawned rather than forked: this runs on a repo thread while the download loop and
+# writer threads hold locks a forked child would inherit locked
+def get_pull_request_dictionary_stage_01_parallel(repo, process_count=None):
+    print("\n\nGetting stage_01 pull request dictionary with %s processes" % str(process_count or os.cpu_count()))
+    storage = storageBackend.get_storage()
+    chunks = list()
+    for pull_type in [OPEN, MERGED, UNMERGED]:
+        pull_ids = storage.list_pull_ids(repo, STORAGE_STATES[pull_type])
+        for index in range(0, len(pull_ids), STAGE_01_CHUNK_SIZE):
+            chunks.append([repo, pull_type, pull_ids[index:index + STAGE_01_CHUNK_SIZE]])
+
+    pull_request_dictionary = {OPEN: PullRequestRecords(),
+                               MERGED: PullRequestRecords(),
+                               UNMERGED: PullRequestRecords()
+                               }
+    with multiprocessing.get_context("spawn").Pool(process_count, _start_stage_01_worker,
+                                                   (storage.BACKEND, storage.TARGET_MANAGER.get_home_path())) as pool:
+        for pull_type, rows, missing_pull_ids in pool.imap(_get_stage_01_rows_for_chunk, chunks):
+            pull_request_dictionary[pull_type].extend(rows)
+            for pull_id in missing_pull_ids:
+                ERROR_LOGGER.write_to_log("This PR " + str(pull_id) + " for " + str(repo) + " has no main_pull.json "
+                                          "THE METHOD CALLER IS GET_PULL_REQUEST_DICTIONARY_STAGE_01_PARALLEL")
+    print("Stage_01 pull request dictionary obtained")
+    return pull_request_dictionary
+
+
+# Every worker process opens the storage once, so e.g. a shard index is read once per worker rather than once per chunk
+def _start_stage_01_worker(backend, home_path):
+    global _stage_01_worker_storage
+    _stage_01_worker_storage = storageBackend.create_storage(backend, home_path)
+
+
+# Runs in a worker process
+def _get_stage_01_rows_for_chunk(chunk):
+    repo, pull_type, pull_ids = chunk
+    storage = _stage_01_worker_storage
+    stripped_repo = targetManager.strip_slashes_from_repository_string(repo)
+    rows = list()
+    missing_pull_ids = list()
+    for pull_id in pull_ids:
+        content = storage.get(repo, STORAGE_STATES[pull_type], pull_id, storageBackend.MAIN_PULL_JSON)
+        if content is None:
+            missing_pull_ids.append(pull_id)
+            continue
+        rows.append(_get_stage_01_row(json.loads(content.decode('utf-8')), stripped_repo, pull_type))
+    return pull_type, rows, missing_pull_ids
+
+
 def get_open_pull_id_list_for_pull_id_dictionary(repo, open_list):
-    open_pull_id_subdirectories = targetManager.get_full_subdirectory_paths_list_from(
-        targetManager.get_json_pulls_open_file_path_to(repo))
     stripped_repo = targetManager.strip_slashes_from_repository_string(repo)
-    for open_pull_id in open_pull_id_subdirectories:
-        with open(os.path.join(open_pull_id, "main_pull.json"), 'r') as open_pull_id_main_json_file:
-            data = json.load(open_pull_id_main_json_file)
-            pull_list = [data["user"]["login"], data["user"]["id"], stripped_repo, data["number"], data["state"],
-                         data["created_at"], data["closed_at"], data["review_comments"], data["commits"],
-                         data["additions"], data["deletions"], data["changed_files"]]
-            open_list.append(pull_list)
-            open_pull_id_main_json_file.close()
+    for data in _get_main_pull_jsons_for(repo, OPEN):
+        open_list.append(_get_stage_01_row(data, stripped_repo, OPEN))
 
 
 def get_merged_pull_id_list_for_pull_id_dictionary(repo, merged_list):
-    merged_pull_id_subdirectories = targetManager.get_full_subdirectory_paths_list_from(
-        targetManager.get_json_pulls_merged_file_path_to(repo))
     stripped_repo = targetManager.strip_slashes_from_repository_string(repo)
-    for merged_pull_id in merged_pull_id_subdirectories:
-        with open(os.path.join(merged_pull_id, "main_pull.json"), 'r') as merged_pull_id_main_json_file:
-            data = json.load(merged_pull_id_main_json_file)
-            pull_list = [data["user"]["login"], data["user"]["id"], stripped_repo, data["number"], (data["state"] + "-merged"),
-                         data["created_at"], data["closed_at"], data["review_comments"], data["commits"],
-                         data["additions"], data["deletions"], data["changed_files"]]
-            merged_list.append(pull_list)
-            merged_pull_id_main_json_file.close()
+    for data in _get_main_pull_jsons_for(repo, MERGED):
+        merged_list.append(_get_stage_01_row(data, stripped_repo, MERGED))
 
 
 def get_unmerged_pull_id_list_for_pull_id_dictionary(repo, unmerged_list):
-    unmerged_pull_id_subdirectories = targetManager.get_full_subdirectory_paths_list_from(
-        targetManager.get_json_pulls_unmerged_file_path_to(repo))
     stripped_repo = targetManager.strip_slashes_from_repository_string(repo)
-    for unmerged_pull_id in unmerged_pull_id_subdirectories:  # unmerged_pull_id)
-        with open(os.path.join(unmerged_pull_id, "main_pull.json"), 'r') as unmerged_pull_id_main_json_file:
-            data = json.load(unmerged_pull_id_main_json_file)
-            pull_list = [data["user"]["login"], data["user"]["id"], stripped_repo, data["number"], (data["state"] + "-unmerged"),
-                         data["created_at"], data["closed_at"], data["review_comments"], data["commits"],
-                         data["additions"], data["deletions"], data["changed_files"]]
-            unmerged_list.append(pull_list)
-            unmerged_pull_id_main_json_file.close()
+    for data in _get_main_pull_jsons_for(repo, UNMERGED):
+        unmerged_list.append(_get_stage_01_row(data, stripped_repo, UNMERGED))
 
 
 # Pass in the generalized dictionary, and refine it to see each person's PR status ONLY ONCE
@@ -294,46 +418,42 @@ def get_refined_drive_by_author_dictionary(dictionary):
 
 
 # HELPER METHOD to Pass in the generalized_dict and pull type to shrink the massive pull request dictionary down to
-#               simply each contributor's name once, and the number of PR's they have of that state
+#               simply each contributor's name once, and the number of PR's they have of that state. The logins are
+#               already integer encoded by PullRequestRecords, so np.unique counts every author's PRs in one pass
 def get_refined_list_for_pull_request_dictionary_stage_02(pr_dict_stage_01, pull_type):
-    generic_list = list()
-    list_name = []
-    for author in pr_dict_stage_01[pull_type]:
-        generic_list.append(author[0] + ":" + str(author[1]))
-    generic_list = list(set(generic_list))
-    temp_dict = {}
-    for item in generic_list:
-        temp_dict.update({item.split(":")[0]: [int(item.split(":")[1]), 0]})
-
-    d_keys = temp_dict.keys()
-    for author in pr_dict_stage_01[pull_type]:
-        if author[0] in d_keys:
-            temp_dict[author[0]][1] += 1
-
-    for key in temp_dict:
-        sub_list = [key]
-        for value in temp_dict[key]:
-            sub_list.append(value)
-        list_name.append(sub_list)
-
-    return sorted(list_name, key=itemgetter(2, 0, 1), reverse=True)
-
-
-# HELPER METHOD to assist in the final refinement of the pull request dictionary structure
+    records = pr_dict_stage_01[pull_type]
+    if not isinstance(records, PullRequestRecords):
+        records = PullRequestRecords(records)
+    if not len(records):
+        return []
+    author_ids = records.get_column(pullRequestRecords.USER_ID)
+    unique_codes, login_codes, pull_counts = np.unique(records.get_codes(pullRequestRecords.LOGIN),
+                                                       return_inverse=True, return_counts=True)
+    unique_logins = np.array(records.get_values(pullRequestRecords.LOGIN))[unique_codes]
+    # An author without an ID keeps pullRequestRecords.MISSING (the smallest int64), and is written out as None again
+    login_ids = np.full(len(unique_logins), pullRequestRecords.MISSING, dtype=np.int64)
+    np.maximum.at(login_ids, login_codes.ravel(), author_ids)
+
+    # Most PRs first, ties broken by login and then ID, all descending
+    order = np.lexsort((login_ids, unique_logins, pull_counts))[::-1]
+    return [[login, None if author_id == pullRequestRecords.MISSING else author_id, pull_count]
+            for login, author_id, pull_count in
+            zip(unique_logins[order].tolist(), login_ids[order].tolist(), pull_counts[order].tolist())]
+
+
+# HELPER METHOD to assist in the final refinement of the pull request dictionary structure. A histogram of the PR
+#               counts gives how many developers made each number of PRs
 def refine_pull_list_to_stage_03(refined_list):
-    final_dict = {}
-    final_list = []
+    if not refined_list:
+        return []
+    developers_per_pull_count = np.bincount(np.array([element[2] for element in refined_list], dtype=np.int64))
+    pull_counts = np.nonzero(developers_per_pull_count)[0]
+    developer_counts = developers_per_pull_count[pull_counts]
 
-    for element in refined_list:
-        final_dict.update({element[2]: 0})
-
-    for element in refined_list:
-        final_dict[element[2]] += 1
-
-    for element in final_dict:
-        final_list.append([final_dict[element], element])
-
-    return sorted(final_list, key=itemgetter(0))
+    # Fewest developers first, ties with the larger PR count first
+    order = np.lexsort((-pull_counts, developer_counts))
+    return [[developer_count, pull_count] for developer_count, pull_count in
+            zip(developer_counts[order].tolist(), pull_counts[order].tolist())]
 
 
 # Method which will write the contents of the generic PR author dictionary to a csv file
@@ -498,7 +618,31 @@ def write_all_drive_by_pr_dictionary_csv_files(repo, pr_dict_drive_by_author):
     print("Drive by csv files complete")
 
 
+# Publish the GitHub id of every PR author of the stage_01 dictionary for usersCollector, in memory for this run and in
+# the repo's author_ids.txt (one id per line) for a later one, so the stage_01 CSV files never have to be read back
+def publish_author_IDs(repo, pr_dict_stage_01):
+    author_IDs = set()
+    for pull_state in [OPEN, MERGED, UNMERGED]:
+        user_IDs = pr_dict_stage_01[pull_state].get_column(pullRequestRecords.USER_ID)
+        author_IDs.update(str(user_ID) for user_ID in np.unique(user_IDs[user_IDs != pullRequestRecords.MISSING]).tolist())
+    with _author_IDs_lock:
+        _author_IDs[repo] = author_IDs
+    author_IDs_path = targetManager.get_author_ids_file_path_for(repo)
+    with open(author_IDs_path + ".tmp", 'w') as author_IDs_file:
+        author_IDs_file.write("".join(user_ID + "\n" for user_ID in sorted(author_IDs, key=int)))
+    os.replace(author_IDs_path + ".tmp", author_IDs_path)
+
+
 def get_user_ID_set_from_repo(repo):
+    with _author_IDs_lock:
+        if repo in _author_IDs:
+            return _author_IDs.pop(repo)
+    author_IDs_path = targetManager.get_author_ids_file_path_for(repo)
+    if os.path.isfile(author_IDs_path):
+        with open(author_IDs_path, 'r') as author_IDs_file:
+            return set(line.strip() for line in author_IDs_file if line.strip())
+
+    # A repo whose PRs were collected before the author ids were published
     user_ID_set_open = _get_user_ID_set_from_open(repo)
     user_ID_set_merged = _get_user_ID_set_from_merged(repo)
     user_ID_set_unmerged = _get_user_ID_set_from_unmerged(repo)
@@ -507,9 +651,8 @@ def get_user_ID_set_from_repo(repo):
 
 def _get_user_ID_set_from_open(repo):
     try:
-        os.chdir(targetManager.get_open_pull_request_level_subdirectory_for(repo))
-        csv_file = open("stage_01_pull_requests_open.csv", 'r')
-        return _clean_data_in_csv(csv_file)
+        with open(os.path.join(targetManager.get_open_pull_request_level_subdirectory_for(repo), "stage_01_pull_requests_open.csv"), 'r', newline="", encoding="utf-8") as csv_file:
+            return _clean_data_in_csv(csv_file)
     except Exception as error:
         ERROR_LOGGER.write_to_log(
             "researchToolkit.py had an error " + str(error) + " with the method _get_user_ID_set_from_open with open")
@@ -518,9 +661,8 @@ def _get_user_ID_set_from_open(repo):
 
 def _get_user_ID_set_from_merged(repo):
     try:
-        os.chdir(targetManager.get_merged_pull_request_level_subdirectory_for(repo))
-        csv_file = open("stage_01_pull_requests_closed_merged.csv", 'r')
-        return _clean_data_in_csv(csv_file)
+        with open(os.path.join(targetManager.get_merged_pull_request_level_subdirectory_for(repo), "stage_01_pull_requests_closed_merged.csv"), 'r', newline="", encoding="utf-8") as csv_file:
+            return _clean_data_in_csv(csv_file)
     except Exception as error:
         ERROR_LOGGER.write_to_log(
             "researchToolkit.py had an error " + str(error) + " with the method _get_user_ID_set_from_merged with merged")
@@ -528,18 +670,20 @@ def _get_user_ID_set_from_merged(repo):
 
 def _get_user_ID_set_from_unmerged(repo):
     try:
-        os.chdir(targetManager.get_unmerged_pull_request_level_subdirectory_for(repo))
-        csv_file = open("stage_01_pull_requests_closed_unmerged.csv", 'r')
-        return _clean_data_in_csv(csv_file)
+        with open(os.path.join(targetManager.get_unmerged_pull_request_level_subdirectory_for(repo), "stage_01_pull_requests_closed_unmerged.csv"), 'r', newline="", encoding="utf-8") as csv_file:
+            return _clean_data_in_csv(csv_file)
     except Exception as error:
         ERROR_LOGGER.write_to_log(
             "researchToolkit.py had an error " + str(error) + " with the method get_user_ID_set_from_unmerged with unmerged")
         return set()
 
+# Every row is one field written with QUOTE_NONE and a \ escape character, so it is read back with the same dialect
+# (undoing the escapes) before it is split into its columns
 def _clean_data_in_csv(csv_file):
     users = []
-    for user in csv_file:
-        users.append(user.split(','))
+    for row in csv.reader(csv_file, quoting=csv.QUOTE_NONE, delimiter='|', escapechar='\\'):
+        if row:
+            users.append(row[0].split(','))
     return _read_data_for_users(users)
 
 def _read_data_for_users(users):
@@ -569,22 +713,20 @@ def _the_combination_of_the_sets(set_open, set_merged, set_unmerged): # making a
 
 def get_user_data_CSV_file_for(user_set, repo):
     user_CSV_data = []
-    os.chdir(targetManager.get_json_github_users_file_path_to(repo))
+    storage = storageBackend.get_storage()
     for user in user_set:
         try:
-            with open(str(user) + "_user.json", 'r') as user_file:
-                data = json.load(user_file)
-                pull_list = [data["login"], data["id"], data["public_repos"], data["public_gists"], data["followers"], data["following"], data["created_at"]]
-                user_CSV_data.append(pull_list)
-                user_file.close()
+            data = json.loads(storage.get(*userCache.get_user_storage_key(user, repo)).decode('utf-8'))
+            pull_list = [data["login"], data["id"], data["public_repos"], data["public_gists"], data["followers"], data["following"], data["created_at"]]
+            user_CSV_data.append(pull_list)
         except Exception as error:
             print("This user: " + str(user) + " had this error " + str(error))
     return user_CSV_data
 
 
 def write_user_data_as_csv(user_CSV_data, repo):
-    os.chdir(targetManager.get_github_users_csv_subdirectory_for(repo))
-    with open("users_data.csv", "w", newline="", encoding="utf-8") as csvfile:
+    users_csv_path = os.path.join(targetManager.get_github_users_csv_subdirectory_for(repo), "users_data.csv")
+    with open(users_csv_path, "w", newline="", encoding="utf-8") as csvfile:
         writer = csv.writer(csvfile, quoting=csv.QUOTE_NONE, delimiter='|', quotechar='', escapechar='\\')
         descriptors = "GITHUB USERNAME,GITHUB ID,# OF PUBLIC REPOS,# OF PUBLIC GISTS,# OF FOLLOWERS,# OF USER IS FOLLOWING,CREATED DATE,"
         writer.writerow([descriptors])
@@ -598,14 +740,17 @@ def write_user_data_as_csv(user_CSV_data, repo):
     return
 
 def get_IDs_for_repo_pull_request(repo):
-    open_list = os.listdir(targetManager.get_json_pulls_open_file_path_to(repo))
-    merged_list = os.listdir(targetManager.get_json_pulls_merged_file_path_to(repo))
-    unmerged_list = os.listdir(targetManager.get_json_pulls_unmerged_file_path_to(repo))
+    storage = storageBackend.get_storage()
+    open_list = storage.list_pull_ids(repo, storageBackend.OPEN)
+    merged_list = storage.list_pull_ids(repo, storageBackend.MERGED)
+    unmerged_list = storage.list_pull_ids(repo, storageBackend.UNMERGED)
     return open_list, merged_list, unmerged_list
 
 def create_commit_id_folders(repo, commit_ids, pull_type):
     print("\nCreating %s commit ID folders. This may take a few moments..." % str(
         pull_type).upper())  # Let the user know what is happening
+    if not storageBackend.get_storage().USES_DIRECTORIES:  # commit_level.json files are kept with the PR's other blobs
+        return
 
     # Write every id we have collected as a folder
     for id in commit_ids:
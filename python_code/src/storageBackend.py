@@ -0,0 +1,440 @@
+# storageBackend.py
+# Date: 10/18/2026
+# Purpose: Decide where the JSON files downloaded from GitHub's API live. Every file is addressed by
+#          (repo, state, pull_id, kind), and is either kept in the Target directory layout (a folder per PR id), as a
+#          blob in one SQLite database per repo (or per run), or as a record of a compressed JSONL shard per repo.
+
+import threading
+import sqlite3
+import gzip
+import shutil
+import os
+from targetManager import TargetManager
+
+# Which backend get_storage() hands out: DIRECTORY_BACKEND, SQLITE_BACKEND or SHARD_BACKEND
+STORAGE_BACKEND = "directory"
+DIRECTORY_BACKEND = "directory"
+SQLITE_BACKEND = "sqlite"
+SHARD_BACKEND = "shard"
+
+# The SQLite backend keeps one database per repo (next to the repo's json folders), or one for the whole run
+SQLITE_DATABASE_PER_REPO = True
+SQLITE_DATABASE_NAME = "json_files.sqlite3"
+
+# How many files iterate_contents reads from a SQLite database at once, so only that many are held in memory
+SQLITE_ITERATE_CHUNK_SIZE = 100
+
+OPEN = "open"
+MERGED = "closed-merged"
+UNMERGED = "closed-unmerged"
+GITHUB_USERS = "github-users"
+PULL_STATES = [OPEN, MERGED, UNMERGED]
+
+MAIN_PULL_JSON = "main_pull.json"
+COMMIT_LEVEL_JSON = "commit_level.json"
+USER_JSON = "user.json"
+
+# Page 1 of a PR's commits is its commit_level.json, every further page is kept as commit_level.json.page_<number>
+COMMIT_PAGE_SUFFIX = ".page_"
+
+# The shard backend keeps one gzip JSONL shard per repo and kind of file, next to the repo's json folders
+PULLS_SHARD = "pulls"
+COMMITS_SHARD = "commits"
+USERS_SHARD = "users"
+SHARD_SUFFIX = ".jsonl.gz"
+SHARD_INDEX_SUFFIX = ".index"
+PULL_IDS_INDEX = "pull_ids" + SHARD_INDEX_SUFFIX
+SHARD_COMPRESS_LEVEL = 6
+
+# The directory main.py was started from, captured before anything changes the working directory
+HOME_PATH = os.getcwd()
+
+def get_commit_page_kind(page_number):
+    if page_number == 1:
+        return COMMIT_LEVEL_JSON
+    return COMMIT_LEVEL_JSON + COMMIT_PAGE_SUFFIX + str(page_number)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = create_storage(STORAGE_BACKEND, HOME_PATH)
+    return _storage
+
+
+# A storage of its own, e.g. for a worker process, that reads the same files as the one get_storage() hands out
+def create_storage(backend, home_path):
+    target_manager = TargetManager(home_path)
+    if backend == SQLITE_BACKEND:
+        return SQLiteStorage(target_manager)
+    if backend == SHARD_BACKEND:
+        return ShardStorage(target_manager)
+    return DirectoryStorage(target_manager)
+
+
+# The original Target layout: json_files/<repo>/pull_requests/<state>/<id>/main_pull.json, a mirror tree under
+# json_files/<repo>/commits/ for commit_level.json, and json_files/<repo>/github-users/<id>_user.json
+class DirectoryStorage:
+    def __init__(self, target_manager):
+        self.BACKEND = DIRECTORY_BACKEND
+        self.TARGET_MANAGER = target_manager
+        self.USES_DIRECTORIES = True
+
+    def get_pull_state_path(self, repo, state):
+        return TargetManager.join_path(self.TARGET_MANAGER.get_json_pulls_file_path_to(repo), state)
+
+    def get_commit_state_path(self, repo, state):
+        return TargetManager.join_path(self.TARGET_MANAGER.get_json_commits_file_path_to(repo), state)
+
+    def get_path(self, repo, state, pull_id, kind):
+        if state == GITHUB_USERS:
+            return os.path.join(self.TARGET_MANAGER.get_json_github_users_file_path_to(repo), str(pull_id) + "_" + kind)
+        if kind.startswith(COMMIT_LEVEL_JSON):
+            return os.path.join(DirectoryStorage.get_commit_state_path(self, repo, state), str(pull_id), kind)
+        return os.path.join(DirectoryStorage.get_pull_state_path(self, repo, state), str(pull_id), kind)
+
+    # A file is written next to its final name first and then renamed into place, so a reader (or a crash) never sees
+    # half of it
+    def put(self, repo, state, pull_id, kind, content):
+        path = DirectoryStorage.get_path(self, repo, state, pull_id, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", 'wb') as output_file:
+            output_file.write(content)
+        os.replace(path + ".tmp", path)
+
+    def get(self, repo, state, pull_id, kind):
+        path = DirectoryStorage.get_path(self, repo, state, pull_id, kind)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as input_file:
+            return input_file.read()
+
+    def exists(self, repo, state, pull_id, kind):
+        return os.path.isfile(DirectoryStorage.get_path(self, repo, state, pull_id, kind))
+
+    def delete(self, repo, state, pull_id, kind):
+        path = DirectoryStorage.get_path(self, repo, state, pull_id, kind)
+        if os.path.isfile(path):
+            os.remove(path)
+
+    # Apply (repo, state, pull id, kind, content) operations in order, a content of None deletes the file
+    def write_batch(self, operations):
+        for repo, state, pull_id, kind, content in operations:
+            if content is None:
+                DirectoryStorage.delete(self, repo, state, pull_id, kind)
+            else:
+                DirectoryStorage.put(self, repo, state, pull_id, kind, content)
+
+    # The PR ids of a state are the folders under pull_requests/<state>
+    def list_pull_ids(self, repo, state):
+        pull_state_path = DirectoryStorage.get_pull_state_path(self, repo, state)
+        return [entry.name for entry in os.scandir(pull_state_path) if entry.is_dir()]
+
+    # Every (pull id, content) of this kind for the PRs of a state, skipping PRs that do not have the file
+    def iterate_contents(self, repo, state, kind):
+        for pull_id in DirectoryStorage.list_pull_ids(self, repo, state):
+            content = DirectoryStorage.get(self, repo, state, pull_id, kind)
+            if content is not None:
+                yield pull_id, content
+
+    def add_pull_ids(self, repo, state, pull_ids):
+        pull_state_path = DirectoryStorage.get_pull_state_path(self, repo, state)
+        for pull_id in pull_ids:
+            try:
+                os.mkdir(os.path.join(pull_state_path, str(pull_id)))
+            except FileExistsError:
+                continue
+
+    # Forget these PRs in this state, along with every file downloaded for them
+    def remove_pull_ids(self, repo, state, pull_ids):
+        for pull_id in pull_ids:
+            for state_path in [DirectoryStorage.get_pull_state_path(self, repo, state),
+                               DirectoryStorage.get_commit_state_path(self, repo, state)]:
+                if os.path.isdir(os.path.join(state_path, str(pull_id))):
+                    shutil.rmtree(os.path.join(state_path, str(pull_id)))
+
+
+# Every file is a row of the blobs table, and the PR ids of every state are rows of the pull_ids table. The database
+# runs in WAL mode, so the CSV builders can read while the downloaders write
+class SQLiteStorage:
+    def __init__(self, target_manager):
+        self.BACKEND = SQLITE_BACKEND
+        self.TARGET_MANAGER = target_manager
+        self.USES_DIRECTORIES = False
+        self.LOCK = threading.Lock()
+        self.CONNECTIONS = dict()
+
+    def get_database_path(self, repo):
+        if SQLITE_DATABASE_PER_REPO:
+            return os.path.join(self.TARGET_MANAGER.get_json_file_path_to(repo), SQLITE_DATABASE_NAME)
+        return os.path.join(self.TARGET_MANAGER.get_important_json_files_path(), SQLITE_DATABASE_NAME)
+
+    def _get_connection(self, repo):
+        database_path = SQLiteStorage.get_database_path(self, repo)
+        if database_path not in self.CONNECTIONS:
+            connection = sqlite3.connect(database_path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS pull_ids (repo TEXT, state TEXT, pull_id TEXT, "
+                               "PRIMARY KEY (repo, state, pull_id))")
+            connection.execute("CREATE TABLE IF NOT EXISTS blobs (repo TEXT, state TEXT, pull_id TEXT, kind TEXT, "
+                               "content BLOB, PRIMARY KEY (repo, state, pull_id, kind))")
+            connection.commit()
+            self.CONNECTIONS[database_path] = connection
+        return self.CONNECTIONS[database_path]
+
+    def put(self, repo, state, pull_id, kind, content):
+        SQLiteStorage.write_batch(self, [(repo, state, pull_id, kind, content)])
+
+    def get(self, repo, state, pull_id, kind):
+        with self.LOCK:
+            row = SQLiteStorage._get_connection(self, repo).execute(
+                "SELECT content FROM blobs WHERE repo = ? AND state = ? AND pull_id = ? AND kind = ?",
+                (repo, state, str(pull_id), kind)).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def exists(self, repo, state, pull_id, kind):
+        with self.LOCK:
+            row = SQLiteStorage._get_connection(self, repo).execute(
+                "SELECT 1 FROM blobs WHERE repo = ? AND state = ? AND pull_id = ? AND kind = ?",
+                (repo, state, str(pull_id), kind)).fetchone()
+        return row is not None
+
+    def delete(self, repo, state, pull_id, kind):
+        SQLiteStorage.write_batch(self, [(repo, state, pull_id, kind, None)])
+
+    # The whole batch is one transaction (per database), instead of one commit per file
+    def write_batch(self, operations):
+        with self.LOCK:
+            connections = list()
+            for repo, state, pull_id, kind, content in operations:
+                connection = SQLiteStorage._get_connection(self, repo)
+                if connection not in connections:
+                    connections.append(connection)
+                if content is None:
+                    connection.execute("DELETE FROM blobs WHERE repo = ? AND state = ? AND pull_id = ? AND kind = ?",
+                                       (repo, state, str(pull_id), kind))
+                else:
+                    connection.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?)",
+                                       (repo, state, str(pull_id), kind, sqlite3.Binary(content)))
+            for connection in connections:
+                connection.commit()
+
+    def list_pull_ids(self, repo, state):
+        with self.LOCK:
+            rows = SQLiteStorage._get_connection(self, repo).execute(
+                "SELECT pull_id FROM pull_ids WHERE repo = ? AND state = ? ORDER BY rowid", (repo, state)).fetchall()
+        return [row[0] for row in rows]
+
+    # Read SQLITE_ITERATE_CHUNK_SIZE files at a time, each chunk picking up after the last pull id of the one before, so
+    # no statement is left open on the shared connection between chunks
+    def iterate_contents(self, repo, state, kind):
+        last_rowid = 0
+        while True:
+            with self.LOCK:
+                rows = SQLiteStorage._get_connection(self, repo).execute(
+                    "SELECT pull_ids.rowid, pull_ids.pull_id, blobs.content FROM pull_ids JOIN blobs ON blobs.repo = "
+                    "pull_ids.repo AND blobs.state = pull_ids.state AND blobs.pull_id = pull_ids.pull_id WHERE "
+                    "pull_ids.repo = ? AND pull_ids.state = ? AND blobs.kind = ? AND pull_ids.rowid > ? ORDER BY "
+                    "pull_ids.rowid LIMIT ?", (repo, state, kind, last_rowid, SQLITE_ITERATE_CHUNK_SIZE)).fetchall()
+            for row in rows:
+                yield row[1], bytes(row[2])
+            if len(rows) < SQLITE_ITERATE_CHUNK_SIZE:
+                return
+            last_rowid = rows[-1][0]
+
+    def add_pull_ids(self, repo, state, pull_ids):
+        with self.LOCK:
+            connection = SQLiteStorage._get_connection(self, repo)
+            connection.executemany("INSERT OR IGNORE INTO pull_ids VALUES (?, ?, ?)",
+                                   [(repo, state, str(pull_id)) for pull_id in pull_ids])
+            connection.commit()
+
+    def remove_pull_ids(self, repo, state, pull_ids):
+        with self.LOCK:
+            connection = SQLiteStorage._get_connection(self, repo)
+            for pull_id in pull_ids:
+                connection.execute("DELETE FROM pull_ids WHERE repo = ? AND state = ? AND pull_id = ?",
+                                   (repo, state, str(pull_id)))
+                connection.execute("DELETE FROM blobs WHERE repo = ? AND state = ? AND pull_id = ?",
+                                   (repo, state, str(pull_id)))
+            connection.commit()
+
+
+# Every file is one line of an append-only gzip JSONL shard (pulls, commits or users) of its repo. Each line is
+# compressed as its own gzip member, so the shard still reads as one JSONL stream (e.g. with zcat), while the offset
+# index next to it ("state <tab> pull id <tab> kind <tab> offset <tab> length" lines) lets a single file be read without
+# decompressing the rest. A rewritten or deleted file only appends to the index, the latest entry of a key wins
+class ShardStorage:
+    def __init__(self, target_manager):
+        self.BACKEND = SHARD_BACKEND
+        self.TARGET_MANAGER = target_manager
+        self.USES_DIRECTORIES = False
+        self.LOCK = threading.Lock()
+        self.INDEXES = dict()
+        self.PULL_IDS = dict()
+
+    @staticmethod
+    def get_shard_for(state, kind):
+        if state == GITHUB_USERS:
+            return USERS_SHARD
+        if kind.startswith(COMMIT_LEVEL_JSON):
+            return COMMITS_SHARD
+        return PULLS_SHARD
+
+    def get_shard_path(self, repo, shard):
+        return os.path.join(self.TARGET_MANAGER.get_json_file_path_to(repo), shard + SHARD_SUFFIX)
+
+    def get_index_path(self, repo, shard):
+        return os.path.join(self.TARGET_MANAGER.get_json_file_path_to(repo), shard + SHARD_INDEX_SUFFIX)
+
+    # Index lines that were cut off by a crash while they were being written are ignored
+    @staticmethod
+    def _read_index_lines(index_path, fields):
+        if not os.path.isfile(index_path):
+            return
+        with open(index_path, 'r', encoding='utf-8') as index_file:
+            for line in index_file:
+                if line.endswith("\n") and line.count("\t") == fields - 1:
+                    yield line.rstrip("\n").split("\t")
+
+    @staticmethod
+    def _append_index_lines(index_path, lines):
+        if not lines:
+            return
+        with open(index_path, 'a+b') as index_file:
+            index_file.seek(0, os.SEEK_END)
+            if index_file.tell() > 0:
+                index_file.seek(index_file.tell() - 1)
+                if index_file.read(1) != b"\n":
+                    index_file.write(b"\t\n")  # end the cut off line with one field too many, so it stays ignored
+            index_file.write("".join("\t".join(str(value) for value in values) + "\n"
+                                     for values in lines).encode('utf-8'))
+
+    def _get_index(self, repo, shard):
+        if (repo, shard) not in self.INDEXES:
+            index = dict()
+            for state, pull_id, kind, offset, length in ShardStorage._read_index_lines(
+                    ShardStorage.get_index_path(self, repo, shard), 5):
+                if int(length) < 0:
+                    index.pop((state, pull_id, kind), None)
+                else:
+                    index[(state, pull_id, kind)] = (int(offset), int(length))
+            self.INDEXES[(repo, shard)] = index
+        return self.INDEXES[(repo, shard)]
+
+    def _get_pull_ids(self, repo):
+        if repo not in self.PULL_IDS:
+            pull_ids = dict()
+            for action, state, pull_id in ShardStorage._read_index_lines(
+                    os.path.join(self.TARGET_MANAGER.get_json_file_path_to(repo), PULL_IDS_INDEX), 3):
+                if action == "+":
+                    pull_ids.setdefault(state, dict())[pull_id] = True
+                else:
+                    pull_ids.setdefault(state, dict()).pop(pull_id, None)
+            self.PULL_IDS[repo] = pull_ids
+        return self.PULL_IDS[repo]
+
+    @staticmethod
+    def _read_record(shard_file, offset, length):
+        shard_file.seek(offset)
+        return gzip.decompress(shard_file.read(length)).rstrip(b"\n")
+
+    def put(self, repo, state, pull_id, kind, content):
+        ShardStorage.write_batch(self, [(repo, state, pull_id, kind, content)])
+
+    def get(self, repo, state, pull_id, kind):
+        shard = ShardStorage.get_shard_for(state, kind)
+        with self.LOCK:
+            location = ShardStorage._get_index(self, repo, shard).get((state, str(pull_id), kind))
+        if location is None:
+            return None
+        with open(ShardStorage.get_shard_path(self, repo, shard), 'rb') as shard_file:
+            return ShardStorage._read_record(shard_file, *location)
+
+    def exists(self, repo, state, pull_id, kind):
+        shard = ShardStorage.get_shard_for(state, kind)
+        with self.LOCK:
+            return (state, str(pull_id), kind) in ShardStorage._get_index(self, repo, shard)
+
+    def delete(self, repo, state, pull_id, kind):
+        ShardStorage.write_batch(self, [(repo, state, pull_id, kind, None)])
+
+    # Every shard touched by the batch is opened once, and its index lines are appended together at the end
+    def write_batch(self, operations):
+        with self.LOCK:
+            shard_files = dict()
+            index_lines = dict()
+            try:
+                for repo, state, pull_id, kind, content in operations:
+                    shard = ShardStorage.get_shard_for(state, kind)
+                    index = ShardStorage._get_index(self, repo, shard)
+                    lines = index_lines.setdefault((repo, shard), list())
+                    if content is None:
+                        if index.pop((state, str(pull_id), kind), None) is not None:
+                            lines.append([state, pull_id, kind, 0, -1])
+                        continue
+                    # Every file has to fit on one JSONL line. JSON can only have a raw line break between tokens (one
+                    # inside a string is always escaped), so pretty printed bodies are joined onto one line as they are
+                    record = gzip.compress(content.replace(b"\r", b"").replace(b"\n", b"") + b"\n",
+                                           SHARD_COMPRESS_LEVEL)
+                    if (repo, shard) not in shard_files:
+                        shard_files[(repo, shard)] = open(ShardStorage.get_shard_path(self, repo, shard), 'ab')
+                    offset = shard_files[(repo, shard)].tell()
+                    shard_files[(repo, shard)].write(record)
+                    lines.append([state, pull_id, kind, offset, len(record)])
+                    index[(state, str(pull_id), kind)] = (offset, len(record))
+            finally:
+                for shard_file in shard_files.values():
+                    shard_file.close()
+                for (repo, shard), lines in index_lines.items():
+                    ShardStorage._append_index_lines(ShardStorage.get_index_path(self, repo, shard), lines)
+
+    def list_pull_ids(self, repo, state):
+        with self.LOCK:
+            return list(ShardStorage._get_pull_ids(self, repo).get(state, dict()))
+
+    # Read the records of a state and kind in shard order, so a whole shard is streamed front to back in one pass
+    def iterate_contents(self, repo, state, kind):
+        shard = ShardStorage.get_shard_for(state, kind)
+        with self.LOCK:
+            pull_ids = ShardStorage._get_pull_ids(self, repo).get(state, dict())
+            index = ShardStorage._get_index(self, repo, shard)
+            locations = sorted((location, key[1]) for key, location in index.items()
+                               if key[0] == state and key[2] == kind and key[1] in pull_ids)
+        if not locations:
+            return
+        with open(ShardStorage.get_shard_path(self, repo, shard), 'rb') as shard_file:
+            for location, pull_id in locations:
+                yield pull_id, ShardStorage._read_record(shard_file, *location)
+
+    def add_pull_ids(self, repo, state, pull_ids):
+        with self.LOCK:
+            state_pull_ids = ShardStorage._get_pull_ids(self, repo).setdefault(state, dict())
+            new_pull_ids = [str(pull_id) for pull_id in pull_ids if str(pull_id) not in state_pull_ids]
+            index_path = os.path.join(self.TARGET_MANAGER.get_json_file_path_to(repo), PULL_IDS_INDEX)
+            ShardStorage._append_index_lines(index_path, [["+", state, pull_id] for pull_id in new_pull_ids])
+            for pull_id in new_pull_ids:
+                state_pull_ids[pull_id] = True
+
+    def remove_pull_ids(self, repo, state, pull_ids):
+        pull_ids = set(str(pull_id) for pull_id in pull_ids)
+        with self.LOCK:
+            state_pull_ids = ShardStorage._get_pull_ids(self, repo).setdefault(state, dict())
+            index_path = os.path.join(self.TARGET_MANAGER.get_json_file_path_to(repo), PULL_IDS_INDEX)
+            removed_pull_ids = [pull_id for pull_id in state_pull_ids if pull_id in pull_ids]
+            ShardStorage._append_index_lines(index_path, [["-", state, pull_id] for pull_id in removed_pull_ids])
+            for pull_id in removed_pull_ids:
+                del state_pull_ids[pull_id]
+            for shard in [PULLS_SHARD, COMMITS_SHARD]:  # forget every file downloaded for them
+                index = ShardStorage._get_index(self, repo, shard)
+                removed_keys = [key for key in index if key[0] == state and key[1] in pull_ids]
+                ShardStorage._append_index_lines(ShardStorage.get_index_path(self, repo, shard),
+                                                 [list(key) + [0, -1] for key in removed_keys])
+                for key in removed_keys:
+                    del index[key]
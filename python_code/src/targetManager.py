@@ -6,6 +6,7 @@
 # Purpose: To assist in the creation & management of generated/downloaded files that are essential to our Undergraduate
 #          research for Marco Gerosa and Igor Steinmacher
 
+import threading
 import shutil
 import os
 
@@ -20,6 +21,12 @@ GITHUB_USERS = "github-users"
 PULL_REQUEST_LEVEL = "pull-request-level"
 PULL_REQUESTS = "pull_requests"
 MAIN_PULL_JSON = "main_pull.json"
+COLLECTION_WATERMARK = "collection_watermark.txt"
+AUTHOR_IDS = "author_ids.txt"
+
+# The directory trees are created by changing into each parent directory, and the working directory is shared by every
+# thread, so only one thread at a time may create them
+_working_directory_lock = threading.RLock()
 
 class TargetManager:
     def __init__(self, home_path):
@@ -71,8 +78,9 @@ class TargetManager:
         return self.CSV_FILES_PATH
 
     def create_target_directory_structure(self):
-        TargetManager.create_main_target_directories(self)
-        TargetManager.populate_main_target_subdirectories(self)
+        with _working_directory_lock:
+            TargetManager.create_main_target_directories(self)
+            TargetManager.populate_main_target_subdirectories(self)
         print("Target directory tree has been successfully created!")
 
     def create_main_target_directories(self):
@@ -241,6 +249,12 @@ class TargetManager:
     def get_collected_repos_path(self):
         return TargetManager.join_path(self.TEXT_FILES_PATH, "_collected-repos")
 
+    def get_collection_watermark_file_path_for(self, repo):
+        return TargetManager.join_path(TargetManager.get_text_file_path_to(self, repo), COLLECTION_WATERMARK)
+
+    def get_author_ids_file_path_for(self, repo):
+        return TargetManager.join_path(TargetManager.get_text_file_path_to(self, repo), AUTHOR_IDS)
+
     def get_json_commits_file_path_to(self, repo):
         repo = TargetManager.strip_slashes_from_repository_string(repo)
         return TargetManager.join_path(TargetManager.get_json_file_path_to(self, repo), "commits")
@@ -318,9 +332,10 @@ class TargetManager:
 
     def create_repo_subdirectories_for(self, repo):
         repo = TargetManager.strip_slashes_from_repository_string(repo)
-        TargetManager._make_repo_directory_in_each_target_subdirectory(self, repo)
-        TargetManager._create_json_repo_subdirectory_tree_for(self, repo)
-        TargetManager.create_csv_subdirectory_tree_for(self, repo)
+        with _working_directory_lock:
+            TargetManager._make_repo_directory_in_each_target_subdirectory(self, repo)
+            TargetManager._create_json_repo_subdirectory_tree_for(self, repo)
+            TargetManager.create_csv_subdirectory_tree_for(self, repo)
 
     def _make_repo_directory_in_each_target_subdirectory(self, repo):
         TargetManager.create_repo_csv_directory_for(self, repo)
@@ -418,48 +433,42 @@ class TargetManager:
     def create_repo_merged_pull_id_directory_for(self, repo, pull_id):
         repo = TargetManager.strip_slashes_from_repository_string(repo)
         try:
-            os.chdir(TargetManager.get_json_pulls_merged_file_path_to(self, repo))
-            os.mkdir(pull_id)
+            os.mkdir(TargetManager.join_path(TargetManager.get_json_pulls_merged_file_path_to(self, repo), pull_id))
         except FileExistsError:
             return
 
     def create_repo_unmerged_pull_id_directory_for(self, repo, pull_id):
         repo = TargetManager.strip_slashes_from_repository_string(repo)
         try:
-            os.chdir(TargetManager.get_json_pulls_unmerged_file_path_to(self, repo))
-            os.mkdir(pull_id)
+            os.mkdir(TargetManager.join_path(TargetManager.get_json_pulls_unmerged_file_path_to(self, repo), pull_id))
         except FileExistsError:
             return
 
     def create_repo_open_pull_id_directory_for(self, repo, pull_id):
         repo = TargetManager.strip_slashes_from_repository_string(repo)
         try:
-            os.chdir(TargetManager.get_json_pulls_open_file_path_to(self, repo))
-            os.mkdir(pull_id)
+            os.mkdir(TargetManager.join_path(TargetManager.get_json_pulls_open_file_path_to(self, repo), pull_id))
         except FileExistsError:
             return
 
     def create_repo_merged_commit_id_directory_for(self, repo, pull_id):
         repo = TargetManager.strip_slashes_from_repository_string(repo)
         try:
-            os.chdir(TargetManager.get_json_commits_merged_file_path_to(self, repo))
-            os.mkdir(pull_id)
+            os.mkdir(TargetManager.join_path(TargetManager.get_json_commits_merged_file_path_to(self, repo), pull_id))
         except FileExistsError:
             return
 
     def create_repo_unmerged_commit_id_directory_for(self, repo, pull_id):
         repo = TargetManager.strip_slashes_from_repository_string(repo)
         try:
-            os.chdir(TargetManager.get_json_commits_unmerged_file_path_to(self, repo))
-            os.mkdir(pull_id)
+            os.mkdir(TargetManager.join_path(TargetManager.get_json_commits_unmerged_file_path_to(self, repo), pull_id))
         except FileExistsError:
             return
 
     def create_repo_open_commit_id_directory_for(self, repo, pull_id):
         repo = TargetManager.strip_slashes_from_repository_string(repo)
         try:
-            os.chdir(TargetManager.get_json_commits_open_file_path_to(self, repo))
-            os.mkdir(pull_id)
+            os.mkdir(TargetManager.join_path(TargetManager.get_json_commits_open_file_path_to(self, repo), pull_id))
         except FileExistsError:
             return
 
@@ -556,23 +565,20 @@ class TargetManager:
     def create_repo_merged_pull_id_directory_for(self, repo, pull_id):
         repo = TargetManager.strip_slashes_from_repository_string(repo)
         try:
-            os.chdir(TargetManager.get_json_pulls_merged_file_path_to(self, repo))
-            os.mkdir(pull_id)
+            os.mkdir(TargetManager.join_path(TargetManager.get_json_pulls_merged_file_path_to(self, repo), pull_id))
         except FileExistsError:
             return
 
     def create_repo_unmerged_pull_id_directory_for(self, repo, pull_id):
         repo = TargetManager.strip_slashes_from_repository_string(repo)
         try:
-            os.chdir(TargetManager.get_json_pulls_unmerged_file_path_to(self, repo))
-            os.mkdir(pull_id)
+            os.mkdir(TargetManager.join_path(TargetManager.get_json_pulls_unmerged_file_path_to(self, repo), pull_id))
         except FileExistsError:
             return
 
     def create_repo_open_pull_id_directory_for(self, repo, pull_id):
         repo = TargetManager.strip_slashes_from_repository_string(repo)
         try:
-            os.chdir(TargetManager.get_json_pulls_open_file_path_to(self, repo))
-            os.mkdir(pull_id)
+            os.mkdir(TargetManager.join_path(TargetManager.get_json_pulls_open_file_path_to(self, repo), pull_id))
         except FileExistsError:
             return
\ No newline at end of file
@@ -0,0 +1,47 @@
+# userCache.py
+# Date: 10/18/2026
+# Purpose: One store of GitHub users shared by every repo, instead of a copy of a user in each repo's github-users
+#          folder. A user is downloaded once and served from the store until it is older than USER_CACHE_TTL_SECONDS,
+#          after which it is revalidated (a 304 from GitHub just makes it fresh again).
+
+import time
+import storageBackend
+import writeBehindWriter
+
+# Keep users in the shared store (USE_GLOBAL_USER_CACHE), and how long a stored user is used without asking GitHub
+USE_GLOBAL_USER_CACHE = False
+USER_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+
+# The shared store is kept by storageBackend as if it were a repo named after Target's _important-json-files folder
+GLOBAL_USERS_REPO = "_important-json-files"
+FETCHED_AT_SUFFIX = ".fetched_at"
+
+
+# The (repo, state, user id, kind) a user's user.json is kept under, in the shared store or in the repo's own folder
+def get_user_storage_key(user_ID, repo):
+    if USE_GLOBAL_USER_CACHE:
+        return GLOBAL_USERS_REPO, storageBackend.GITHUB_USERS, str(user_ID), storageBackend.USER_JSON
+    return repo, storageBackend.GITHUB_USERS, str(user_ID), storageBackend.USER_JSON
+
+
+def _get_fetched_at_key(user_ID):
+    return GLOBAL_USERS_REPO, storageBackend.GITHUB_USERS, str(user_ID), storageBackend.USER_JSON + FETCHED_AT_SUFFIX
+
+
+# Whether the shared store has the user, fetched (or revalidated) less than USER_CACHE_TTL_SECONDS ago
+def is_user_fresh(user_ID):
+    if not USE_GLOBAL_USER_CACHE:
+        return False
+    storage = storageBackend.get_storage()
+    try:
+        fetched_at = float(storage.get(*_get_fetched_at_key(user_ID)) or 0)
+    except ValueError:
+        return False
+    return time.time() - fetched_at < USER_CACHE_TTL_SECONDS and storage.exists(*get_user_storage_key(user_ID, None))
+
+
+# Called from the download loop
+async def record_user_fetched(user_ID):
+    if USE_GLOBAL_USER_CACHE:
+        await writeBehindWriter.get_write_behind_writer().async_put(*_get_fetched_at_key(user_ID),
+                                                                    str(time.time()).encode('utf-8'))
@@ -8,6 +8,8 @@ import time
 import github
 import researchToolkit
 from logger import Logger
+from checkpointJournal import CHECKPOINT_JOURNAL
+import checkpointJournal
 from targetManager import TargetManager
 
 HOME_PATH = os.getcwd()
@@ -37,7 +39,15 @@ def run_collector(repo):
             Logger.add_tabs(1) + "Starting to gather User data from Github. There are " +
             str(len(user_ID_set)) + " users" + get_time_string(start_time))
 
-        github.download_user_data(user_ID_set, repo)
+        # Users already downloaded (by an interrupted run, or while the PRs were downloading) are not downloaded again
+        finished_user_IDs = CHECKPOINT_JOURNAL.get_finished_items(repo, checkpointJournal.USERS)
+
+        def on_user_downloaded(user_ID):
+            CHECKPOINT_JOURNAL.record_item_finished(repo, checkpointJournal.USERS, user_ID)
+
+        failed_user_IDs = github.download_user_data([user_ID for user_ID in user_ID_set
+                                                     if str(user_ID) not in finished_user_IDs], repo,
+                                                    on_user_downloaded)
 
         INFO_LOGGER.write_to_log(
             Logger.add_tabs(1) + "Finished gathering User data from Github" + get_time_string(start_time))
@@ -52,9 +62,17 @@ def run_collector(repo):
         INFO_LOGGER.write_to_log(
             Logger.add_tabs(1) + "Finished to write User CSV for the REPO" + get_time_string(start_time))
         # make the user CSV for that repo where it needs to go!3
-        return
+
+        # A user that still failed after MAX_DOWNLOAD_ATTEMPTS keeps the phase unfinished, so the next run asks for it
+        # again
+        if failed_user_IDs:
+            INFO_LOGGER.write_to_log(Logger.add_tabs(1) + str(len(failed_user_IDs)) + " users of " + repo + " failed "
+                                     "to download, the next run will try them again" + get_time_string(start_time))
+            return False
+        return True
     except Exception as error:
         ERROR_LOGGER.write_to_log("UserCollector had an error " + str(error) + " with this repo " + str(repo))
+        return False
 
 
 
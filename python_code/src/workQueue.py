@@ -0,0 +1,187 @@
+# workQueue.py
+# Date: 10/18/2026
+# Purpose: A work queue that several collector nodes (each with its own github_accounts) share through one SQLite file
+#          on a shared volume. A node claims an item (a repo, or any other unit of work such as a batch of PRs) for a
+#          lease, renews the lease while it works, and marks the item finished. The leases of a node that died run out,
+#          and their items are claimed again by the other nodes.
+
+import threading
+import sqlite3
+import socket
+import time
+import os
+from targetManager import TargetManager
+from logger import Logger
+
+# How long a claim lasts without being renewed, and how often the leases a node holds are renewed
+LEASE_SECONDS = 600
+HEARTBEAT_SECONDS = 60
+
+# How long a node waits before looking again when every unfinished item is leased by another node
+POLL_SECONDS = 30
+
+# How many times an item is claimed before it is given up on (until the items are added again, e.g. by a new run)
+MAX_CLAIMS = 3
+
+PENDING = "pending"
+LEASED = "leased"
+FINISHED = "finished"
+FAILED = "failed"
+
+targetManager = TargetManager(os.getcwd())
+ERROR_LOGGER = Logger(targetManager.get_important_text_files_path(), "ERROR_LOG", "ERROR")
+
+
+# The name a node claims items under, unique for every process on every machine
+def get_node_name():
+    return socket.gethostname() + "-" + str(os.getpid())
+
+
+# Every change is made in its own BEGIN IMMEDIATE transaction, which holds SQLite's lock on the file, so two nodes can
+# never claim the same item. The database keeps SQLite's default rollback journal, which (unlike WAL) also works on
+# network file systems
+class WorkQueue:
+    def __init__(self, queue_path, node_name=None):
+        self.QUEUE_PATH = str(queue_path)
+        self.NODE_NAME = node_name if node_name is not None else get_node_name()
+        self.LOCK = threading.Lock()
+        self.HELD_ITEMS = set()
+        self.HEARTBEAT = None
+        self.CONNECTION = sqlite3.connect(self.QUEUE_PATH, timeout=60, isolation_level=None,
+                                          check_same_thread=False)
+        self.CONNECTION.execute("CREATE TABLE IF NOT EXISTS work_items (item TEXT PRIMARY KEY, priority INTEGER, "
+                                "status TEXT, node TEXT, lease_expires REAL, claims INTEGER)")
+
+    def _run_transaction(self, transaction):
+        with self.LOCK:
+            self.CONNECTION.execute("BEGIN IMMEDIATE")
+            try:
+                result = transaction(self.CONNECTION)
+            except Exception:
+                self.CONNECTION.execute("ROLLBACK")
+                raise
+            self.CONNECTION.execute("COMMIT")
+            return result
+
+    # Queue [item, priority] pairs, highest priority first. Items already queued keep their state, except that failed
+    # items are queued again
+    def add_items(self, items_with_priorities):
+        def add(connection):
+            for item, priority in items_with_priorities:
+                connection.execute("INSERT INTO work_items VALUES (?, ?, ?, NULL, NULL, 0) ON CONFLICT(item) DO "
+                                   "UPDATE SET status = ?, claims = 0 WHERE status = ?",
+                                   (item, priority, PENDING, PENDING, FAILED))
+        WorkQueue._run_transaction(self, add)
+
+    # Lease the pending item with the highest priority (or an item whose lease ran out) and return it, or None when no
+    # item can be claimed right now
+    def claim(self):
+        def claim_item(connection):
+            now = time.time()
+            connection.execute("UPDATE work_items SET status = ? WHERE status = ? AND lease_expires < ? AND "
+                               "claims >= ?", (FAILED, LEASED, now, MAX_CLAIMS))
+            row = connection.execute("SELECT item FROM work_items WHERE status = ? OR (status = ? AND "
+                                     "lease_expires < ?) ORDER BY priority DESC, rowid LIMIT 1",
+                                     (PENDING, LEASED, now)).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE work_items SET status = ?, node = ?, lease_expires = ?, claims = claims + 1 "
+                               "WHERE item = ?", (LEASED, self.NODE_NAME, now + LEASE_SECONDS, row[0]))
+            return row[0]
+        item = WorkQueue._run_transaction(self, claim_item)
+        if item is not None:
+            with self.LOCK:
+                self.HELD_ITEMS.add(item)
+            WorkQueue._start_heartbeat(self)
+        return item
+
+    # Renew the leases of every item this node holds, and return the items whose lease it has lost
+    def renew_leases(self):
+        with self.LOCK:
+            held_items = list(self.HELD_ITEMS)
+
+        def renew(connection):
+            lost_items = list()
+            for item in held_items:
+                renewed = connection.execute("UPDATE work_items SET lease_expires = ? WHERE item = ? AND status = ? "
+                                             "AND node = ?", (time.time() + LEASE_SECONDS, item, LEASED,
+                                                              self.NODE_NAME)).rowcount
+                if not renewed:
+                    lost_items.append(item)
+            return lost_items
+        return WorkQueue._run_transaction(self, renew)
+
+    # Mark a claimed item finished (or failed, when it may be retried by the next claim), and return how many items are
+    # not finished yet, or None if the item's lease was lost to another node. Exactly one node sees 0, the one that
+    # finished the last item
+    def finish(self, item, succeeded=True):
+        def finish_item(connection):
+            if succeeded:
+                updated = connection.execute("UPDATE work_items SET status = ?, lease_expires = NULL WHERE item = ? "
+                                             "AND node = ? AND status = ?",
+                                             (FINISHED, item, self.NODE_NAME, LEASED)).rowcount
+            else:
+                updated = connection.execute("UPDATE work_items SET status = CASE WHEN claims >= ? THEN ? ELSE ? END, "
+                                             "lease_expires = NULL WHERE item = ? AND node = ? AND status = ?",
+                                             (MAX_CLAIMS, FAILED, PENDING, item, self.NODE_NAME, LEASED)).rowcount
+            return WorkQueue._count_unfinished_items(connection) if updated else None
+        with self.LOCK:
+            self.HELD_ITEMS.discard(item)
+        return WorkQueue._run_transaction(self, finish_item)
+
+    @staticmethod
+    def _count_unfinished_items(connection):
+        return connection.execute("SELECT COUNT(*) FROM work_items WHERE status IN (?, ?)",
+                                  (PENDING, LEASED)).fetchone()[0]
+
+    def get_unfinished_item_count(self):
+        return WorkQueue._run_transaction(self, WorkQueue._count_unfinished_items)
+
+    # The status of every item: {item: [status, node, claims]}
+    def get_items(self):
+        rows = WorkQueue._run_transaction(self, lambda connection: connection.execute(
+            "SELECT item, status, node, claims FROM work_items ORDER BY priority DESC, rowid").fetchall())
+        return {row[0]: [row[1], row[2], row[3]] for row in rows}
+
+    # Forget every item, e.g. once a whole run has finished
+    def clear(self):
+        WorkQueue._run_transaction(self, lambda connection: connection.execute("DELETE FROM work_items"))
+
+    # Keep claiming items and calling work_function(item) (which returns whether the item is done) until every item is
+    # finished or failed. While other nodes hold the last items, wait in case one of their leases runs out
+    def work_until_finished(self, work_function):
+        while True:
+            item = WorkQueue.claim(self)
+            if item is None:
+                if not WorkQueue.get_unfinished_item_count(self):
+                    return False
+                time.sleep(POLL_SECONDS)
+                continue
+            try:
+                succeeded = work_function(item)
+            except Exception as error:
+                ERROR_LOGGER.write_to_log("This work item " + str(item) + " has this error " + str(error) +
+                                          " THE METHOD CALLER IS WORK_QUEUE")
+                succeeded = False
+            if WorkQueue.finish(self, item, succeeded) == 0:
+                return True
+
+    def _start_heartbeat(self):
+        with self.LOCK:
+            if self.HEARTBEAT is not None:
+                return
+            self.HEARTBEAT = threading.Thread(target=WorkQueue._heartbeat_loop, args=(self,), daemon=True)
+        self.HEARTBEAT.start()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(HEARTBEAT_SECONDS)
+            try:
+                for item in WorkQueue.renew_leases(self):
+                    ERROR_LOGGER.write_to_log("The lease of " + str(item) + " ran out before it was renewed, another "
+                                              "node may be working on it THE METHOD CALLER IS WORK_QUEUE")
+                    with self.LOCK:
+                        self.HELD_ITEMS.discard(item)
+            except Exception as error:
+                ERROR_LOGGER.write_to_log("Renewing the leases of " + self.NODE_NAME + " has this error " +
+                                          str(error) + " THE METHOD CALLER IS WORK_QUEUE")
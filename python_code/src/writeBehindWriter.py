@@ -0,0 +1,176 @@
+# writeBehindWriter.py
+# Date: 10/18/2026
+# Purpose: Take the writes of downloaded files off the download engine. Writes are handed to a bounded queue and stored
+#          by a few writer threads in batches, so the network side never waits on the disk (e.g. a slow NFS volume).
+
+import contextvars
+import threading
+import asyncio
+import queue
+import os
+from targetManager import TargetManager
+from logger import Logger
+import storageBackend
+
+# How many writer threads store files (0 stores every file right away, on the caller's thread), how many writes may
+# wait in each writer's queue before callers are held back, and how many queued writes a writer stores at once
+WRITE_BEHIND_WRITERS = 2
+WRITE_BEHIND_QUEUE_SIZE = 1000
+WRITE_BEHIND_BATCH_SIZE = 100
+
+targetManager = TargetManager(os.getcwd())
+ERROR_LOGGER = Logger(targetManager.get_important_text_files_path(), "ERROR_LOG", "ERROR")
+
+_writer = None
+_writer_lock = threading.Lock()
+
+# The (repo, state, pull id) groups the current download job queued writes for, see record_written_groups
+_written_groups = contextvars.ContextVar("written_groups", default=None)
+
+
+def get_write_behind_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehindWriter(storageBackend.get_storage(), WRITE_BEHIND_WRITERS)
+    return _writer
+
+
+# Collect the (repo, state, pull id) group of every write queued from now on by this thread or asyncio task (and the
+# tasks it starts), so call_when_written can tell whether they were all stored
+def record_written_groups():
+    written_groups = set()
+    _written_groups.set(written_groups)
+    return written_groups
+
+
+# Every file of a PR (or user) goes to the same writer thread, so the writes of one file are always stored in the order
+# they were queued
+class WriteBehindWriter:
+    def __init__(self, storage, writer_count):
+        self.STORAGE = storage
+        self.WRITER_COUNT = writer_count
+        self.QUEUES = [queue.Queue(WRITE_BEHIND_QUEUE_SIZE) for writer in range(writer_count)]
+        self.CONDITION = threading.Condition()
+        self.QUEUED = [0] * writer_count
+        self.WRITTEN = [0] * writer_count
+        self.CALLBACKS = list()
+        self.FAILED_WRITES = set()
+        for writer in range(writer_count):
+            threading.Thread(target=WriteBehindWriter._write_loop, args=(self, writer), daemon=True).start()
+
+    def put(self, repo, state, pull_id, kind, content):
+        WriteBehindWriter._queue_operation(self, (repo, state, pull_id, kind, content))
+
+    def delete(self, repo, state, pull_id, kind):
+        WriteBehindWriter._queue_operation(self, (repo, state, pull_id, kind, None))
+
+    # put and delete for the download loop, which must never block on a full queue: when the writer is
+    # WRITE_BEHIND_QUEUE_SIZE writes behind, only the calling job waits (on an executor thread) for room in the queue
+    async def async_put(self, repo, state, pull_id, kind, content):
+        await WriteBehindWriter._async_queue_operation(self, (repo, state, pull_id, kind, content))
+
+    async def async_delete(self, repo, state, pull_id, kind):
+        await WriteBehindWriter._async_queue_operation(self, (repo, state, pull_id, kind, None))
+
+    @staticmethod
+    def _get_group(operation):
+        return operation[0], operation[1], str(operation[2])
+
+    def _get_writer_for(self, operation):
+        written_groups = _written_groups.get()
+        if written_groups is not None:
+            written_groups.add(WriteBehindWriter._get_group(operation))
+        if not self.WRITER_COUNT:
+            return None
+        writer = hash(WriteBehindWriter._get_group(operation)) % self.WRITER_COUNT
+        with self.CONDITION:
+            self.QUEUED[writer] += 1
+        return writer
+
+    def _queue_operation(self, operation):
+        writer = WriteBehindWriter._get_writer_for(self, operation)
+        if writer is None:
+            WriteBehindWriter._write_operations(self, [operation])
+            return
+        self.QUEUES[writer].put(operation)  # blocks while this writer is WRITE_BEHIND_QUEUE_SIZE writes behind
+
+    async def _async_queue_operation(self, operation):
+        writer = WriteBehindWriter._get_writer_for(self, operation)
+        if writer is None:
+            await asyncio.get_event_loop().run_in_executor(None, WriteBehindWriter._write_operations, self, [operation])
+            return
+        try:
+            self.QUEUES[writer].put_nowait(operation)
+        except queue.Full:
+            await asyncio.get_event_loop().run_in_executor(None, self.QUEUES[writer].put, operation)
+
+    def _is_written(self, queued_counts):
+        return all(written >= queued for written, queued in zip(self.WRITTEN, queued_counts))
+
+    # Call back once everything queued so far has been stored (e.g. to record a download in the checkpoint journal).
+    # When a write of one of the written_groups (see record_written_groups) failed, the callback is not called at all
+    def call_when_written(self, callback, written_groups=()):
+        with self.CONDITION:
+            if not WriteBehindWriter._is_written(self, self.QUEUED):
+                self.CALLBACKS.append((list(self.QUEUED), callback, set(written_groups)))
+                return
+        WriteBehindWriter._run_callback(self, callback, written_groups)
+
+    # Wait until everything queued so far has been stored
+    def flush(self):
+        with self.CONDITION:
+            queued_counts = list(self.QUEUED)
+            self.CONDITION.wait_for(lambda: WriteBehindWriter._is_written(self, queued_counts))
+
+    # A write that failed is remembered until the same file is written successfully
+    def _write_operations(self, operations):
+        try:
+            self.STORAGE.write_batch(operations)
+            failed = False
+        except Exception as error:
+            ERROR_LOGGER.write_to_log("This batch of " + str(len(operations)) + " writes has this error " +
+                                      str(error) + " THE METHOD CALLER IS WRITE_BEHIND_WRITER")
+            failed = True
+        with self.CONDITION:
+            for operation in operations:
+                if failed:
+                    self.FAILED_WRITES.add(WriteBehindWriter._get_group(operation) + (operation[3],))
+                else:
+                    self.FAILED_WRITES.discard(WriteBehindWriter._get_group(operation) + (operation[3],))
+
+    # Whether a write of one of the written_groups (see record_written_groups) failed and has not been stored since
+    def has_failed_write(self, written_groups):
+        with self.CONDITION:
+            return any(failed_write[:3] in written_groups for failed_write in self.FAILED_WRITES)
+
+    def _run_callback(self, callback, written_groups):
+        if WriteBehindWriter.has_failed_write(self, written_groups):
+            ERROR_LOGGER.write_to_log("Not every write of " + str(sorted(written_groups)) + " was stored, so it is not "
+                                      "reported as finished THE METHOD CALLER IS WRITE_BEHIND_WRITER")
+            return
+        try:
+            callback()
+        except Exception as error:
+            ERROR_LOGGER.write_to_log("A write behind callback has this error " + str(error) +
+                                      " THE METHOD CALLER IS WRITE_BEHIND_WRITER")
+
+    def _write_loop(self, writer):
+        writer_queue = self.QUEUES[writer]
+        while True:
+            operations = [writer_queue.get()]
+            while len(operations) < WRITE_BEHIND_BATCH_SIZE:
+                try:
+                    operations.append(writer_queue.get_nowait())
+                except queue.Empty:
+                    break
+            WriteBehindWriter._write_operations(self, operations)
+            with self.CONDITION:
+                self.WRITTEN[writer] += len(operations)
+                ready_callbacks = [callback for callback in self.CALLBACKS
+                                   if WriteBehindWriter._is_written(self, callback[0])]
+                self.CALLBACKS = [callback for callback in self.CALLBACKS
+                                  if not WriteBehindWriter._is_written(self, callback[0])]
+                self.CONDITION.notify_all()
+            for queued_counts, callback, written_groups in ready_callbacks:
+                WriteBehindWriter._run_callback(self, callback, written_groups)
@@ -0,0 +1,117 @@
+# test_graphqlDownloader.py
+# Date: 10/18/2026
+# Purpose: Run download_pull_requests_graphql against a local stand-in GraphQL server and check that every main_pull.json
+#          it writes names its fields the way the REST API does.
+#          Run from the repository root with: python -m unittest discover python_code/tests
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import unittest
+import tempfile
+import json
+import time
+import sys
+import os
+import re
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+REPO = "/some-owner/some-repo"
+PULL_STATE = "closed-merged"
+
+GRAPHQL_PULL_REQUESTS = {
+    "3": {"number": 3, "state": "MERGED", "createdAt": "2017-01-01T00:00:00Z", "closedAt": "2017-01-02T00:00:00Z",
+          "additions": 10, "deletions": 2, "changedFiles": 3,
+          "author": {"__typename": "User", "login": "octocat", "databaseId": 583231},
+          "commits": {"totalCount": 4},
+          "reviews": {"pageInfo": {"hasNextPage": False},
+                      "nodes": [{"comments": {"totalCount": 2}}, {"comments": {"totalCount": 1}}]}},
+    "5": {"number": 5, "state": "OPEN", "createdAt": "2017-02-01T00:00:00Z", "closedAt": None,
+          "additions": 1, "deletions": 0, "changedFiles": 1,
+          "author": {"__typename": "Bot", "login": "dependabot", "databaseId": 49699333},
+          "commits": {"totalCount": 1},
+          "reviews": {"pageInfo": {"hasNextPage": False}, "nodes": []}},
+    "7": {"number": 7, "state": "CLOSED", "createdAt": "2017-03-01T00:00:00Z", "closedAt": "2017-03-05T00:00:00Z",
+          "additions": 0, "deletions": 5, "changedFiles": 2, "author": None,
+          "commits": {"totalCount": 2},
+          "reviews": {"pageInfo": {"hasNextPage": False}, "nodes": [{"comments": {"totalCount": 0}}]}}}
+
+EXPECTED_MAIN_PULLS = {
+    "3": {"user": {"login": "octocat", "id": 583231}, "number": 3, "state": "closed",
+          "created_at": "2017-01-01T00:00:00Z", "closed_at": "2017-01-02T00:00:00Z", "review_comments": 3,
+          "commits": 4, "additions": 10, "deletions": 2, "changed_files": 3},
+    "5": {"user": {"login": "dependabot[bot]", "id": 49699333}, "number": 5, "state": "open",
+          "created_at": "2017-02-01T00:00:00Z", "closed_at": None, "review_comments": 0,
+          "commits": 1, "additions": 1, "deletions": 0, "changed_files": 1},
+    "7": {"user": {"login": "ghost", "id": 10137}, "number": 7, "state": "closed",
+          "created_at": "2017-03-01T00:00:00Z", "closed_at": "2017-03-05T00:00:00Z", "review_comments": 0,
+          "commits": 2, "additions": 0, "deletions": 5, "changed_files": 2}}
+
+
+# Answers every query with the aliased pullRequest fields it asks for, like api.github.com/graphql would
+class StandInGraphQLHandler(BaseHTTPRequestHandler):
+    queries = list()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])).decode('utf-8'))
+        StandInGraphQLHandler.queries.append(body)
+        repository = {"pr_" + pull_id: GRAPHQL_PULL_REQUESTS.get(pull_id)
+                      for pull_id in re.findall(r"pr_(\d+): pullRequest", body["query"])}
+        content = json.dumps({"data": {"repository": repository}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("X-RateLimit-Resource", "graphql")
+        self.send_header("X-RateLimit-Remaining", "4999")
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        return
+
+
+class GraphQLDownloaderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.original_path = os.getcwd()
+        cls.temporary_directory = tempfile.TemporaryDirectory()
+        os.chdir(cls.temporary_directory.name)  # the modules find Target in the working directory they are imported in
+        sys.path.insert(0, SRC_PATH)
+        import github
+        import storageBackend
+        cls.github = github
+        cls.storageBackend = storageBackend
+        github.targetManager.create_target_directory_structure()
+        github.targetManager.create_repo_subdirectories_for(REPO)
+        os.chdir(cls.temporary_directory.name)
+        storageBackend.get_storage().add_pull_ids(REPO, PULL_STATE, list(GRAPHQL_PULL_REQUESTS))
+
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInGraphQLHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        github.GRAPHQL_URL = "http://127.0.0.1:%d/graphql" % cls.server.server_address[1]
+        github.GRAPHQL_BATCH_SIZE = 2
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        os.chdir(cls.original_path)
+        sys.path.remove(SRC_PATH)
+
+    def test_main_pull_json_uses_rest_field_names(self):
+        downloaded_pull_ids = list()
+        pull_ids = [[PULL_STATE, pull_id] for pull_id in sorted(GRAPHQL_PULL_REQUESTS)]
+        self.github.download_pull_requests_graphql(REPO, pull_ids, downloaded_pull_ids.append)
+
+        self.assertEqual(len(StandInGraphQLHandler.queries), 2)  # three PRs, two to a batch
+        self.assertEqual(StandInGraphQLHandler.queries[0]["variables"], {"owner": "some-owner", "name": "some-repo"})
+        storage = self.storageBackend.get_storage()
+        for pull_id, expected_main_pull in EXPECTED_MAIN_PULLS.items():
+            main_pull = json.loads(storage.get(REPO, PULL_STATE, pull_id, self.storageBackend.MAIN_PULL_JSON))
+            self.assertEqual(main_pull, expected_main_pull)
+        self.assertEqual(sorted(pull_info[1] for pull_info in downloaded_pull_ids), sorted(GRAPHQL_PULL_REQUESTS))
+
+
+if __name__ == '__main__':
+    unittest.main()
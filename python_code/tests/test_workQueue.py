@@ -0,0 +1,125 @@
+# test_workQueue.py
+# Date: 10/18/2026
+# Purpose: Run several collector nodes as local processes against one work queue, and check that every item is worked
+#          on exactly once, that exactly one node finishes the last item, and that the item of a node that died while
+#          holding it is claimed again once its lease runs out.
+#          Run from the repository root with: python -m unittest discover python_code/tests
+
+import multiprocessing
+import unittest
+import tempfile
+import sqlite3
+import time
+import sys
+import os
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+ITEM_COUNT = 24
+NODE_COUNT = 4
+
+
+# Runs in a node process: work items (each taking work_seconds) until the queue is done, and write every item worked on,
+# then whether this node finished the last item, to <node name>.txt. A crashing node claims one item and dies
+def run_node(queue_path, node_name, work_seconds, lease_seconds, crash):
+    sys.path.insert(0, SRC_PATH)
+    import workQueue
+    workQueue.LEASE_SECONDS = lease_seconds
+    workQueue.HEARTBEAT_SECONDS = lease_seconds / 4
+    workQueue.POLL_SECONDS = 0.1
+    work_queue = workQueue.WorkQueue(queue_path, node_name)
+    if crash:
+        work_queue.claim()
+        os._exit(1)
+
+    def work(item):
+        with open(node_name + ".txt", 'a') as node_file:
+            node_file.write(item + "\n")
+        time.sleep(work_seconds)
+        return True
+    finished_last_item = work_queue.work_until_finished(work)
+    with open(node_name + ".txt", 'a') as node_file:
+        node_file.write("LAST " + str(finished_last_item) + "\n")
+
+
+class WorkQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.original_path = os.getcwd()
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        os.chdir(self.temporary_directory.name)
+        os.makedirs(os.path.join("Target", "text_files", "_important-text-files"))
+        sys.path.insert(0, SRC_PATH)
+        import workQueue
+        self.workQueue = workQueue
+        self.queue_path = os.path.join(self.temporary_directory.name, "work_queue.sqlite3")
+        self.items = ["/owner/repo-" + str(item) for item in range(ITEM_COUNT)]
+        work_queue = workQueue.WorkQueue(self.queue_path, "test")
+        work_queue.add_items([[item, index] for index, item in enumerate(self.items)])
+        work_queue.CONNECTION.close()
+        self.context = multiprocessing.get_context("spawn")
+
+    def tearDown(self):
+        os.chdir(self.original_path)
+        sys.path.remove(SRC_PATH)
+        self.temporary_directory.cleanup()
+
+    def start_node(self, node_name, work_seconds=0.05, lease_seconds=30, crash=False):
+        node = self.context.Process(target=run_node, args=(self.queue_path, node_name, work_seconds, lease_seconds,
+                                                            crash))
+        node.start()
+        return node
+
+    def read_node_files(self, node_names):
+        worked_items = list()
+        last_nodes = list()
+        for node_name in node_names:
+            with open(node_name + ".txt", 'r') as node_file:
+                lines = node_file.read().splitlines()
+            worked_items += [line for line in lines if not line.startswith("LAST ")]
+            if "LAST True" in lines:
+                last_nodes.append(node_name)
+        return worked_items, last_nodes
+
+    def get_statuses(self):
+        connection = sqlite3.connect(self.queue_path)
+        rows = connection.execute("SELECT item, status, claims FROM work_items").fetchall()
+        connection.close()
+        return {item: [status, claims] for item, status, claims in rows}
+
+    def test_nodes_share_the_items(self):
+        node_names = ["node-" + str(node) for node in range(NODE_COUNT)]
+        nodes = [self.start_node(node_name) for node_name in node_names]
+        for node in nodes:
+            node.join(60)
+            self.assertEqual(node.exitcode, 0)
+
+        worked_items, last_nodes = self.read_node_files(node_names)
+        self.assertEqual(sorted(worked_items), sorted(self.items))  # every item once, none twice
+        self.assertEqual(len(last_nodes), 1)
+        self.assertEqual({status for status, claims in self.get_statuses().values()}, {self.workQueue.FINISHED})
+
+    def test_the_item_of_a_dead_node_is_claimed_again(self):
+        crashed_node = self.start_node("crashed", lease_seconds=1, crash=True)
+        crashed_node.join(60)
+        self.assertEqual(crashed_node.exitcode, 1)
+        lost_item = [item for item, (status, claims) in self.get_statuses().items()
+                     if status == self.workQueue.LEASED]
+        self.assertEqual(len(lost_item), 1)
+
+        # Every item takes longer than a lease, so the surviving nodes only keep them by renewing their leases
+        node_names = ["node-0", "node-1", "node-2"]
+        nodes = [self.start_node(node_name, work_seconds=0.6, lease_seconds=0.4) for node_name in node_names]
+        for node in nodes:
+            node.join(60)
+            self.assertEqual(node.exitcode, 0)
+
+        worked_items, last_nodes = self.read_node_files(node_names)
+        self.assertEqual(sorted(worked_items), sorted(self.items))
+        self.assertEqual(len(last_nodes), 1)
+        statuses = self.get_statuses()
+        self.assertEqual({status for status, claims in statuses.values()}, {self.workQueue.FINISHED})
+        self.assertEqual(statuses[lost_item[0]][1], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()